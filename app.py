@@ -4,7 +4,7 @@ import time
 import json
 import config
 from dotenv import load_dotenv
-from engine import ai_handler, map_renderer, analytics, validator
+from engine import ai_handler, map_renderer, analytics, validator, models
 from utils import state_manager, exporter
 
 # Load environment variables
@@ -40,7 +40,7 @@ with st.sidebar:
             try:
                 # Read and parse
                 json_data = uploaded_file.getvalue().decode("utf-8")
-                loaded_scenario = ai_handler.WargameScenario.model_validate_json(json_data)
+                loaded_scenario = models.WargameScenario.model_validate_json(json_data)
                 state_manager.load_existing_scenario(loaded_scenario)
                 st.success("Scenario loaded!")
                 time.sleep(1)
@@ -210,18 +210,18 @@ if st.session_state.current_scenario:
             if coords:
                 fig = map_renderer.render_map_on_mapbox(
                     scenario.terrain_map,
-                    current_frame.unit_positions,
+                    current_frame.records,
                     coords[0],
                     coords[1]
                 )
             else:
                 prev_units = None
                 if current_idx > 0:
-                    prev_units = scenario.frames[current_idx-1].unit_positions
+                    prev_units = scenario.frames[current_idx-1].records
 
                 fig = map_renderer.render_map(
                     scenario.terrain_map, 
-                    current_frame.unit_positions,
+                    current_frame.records,
                     previous_units=prev_units,
                     show_arrows=show_arrows,
                     show_labels=show_labels
@@ -357,13 +357,13 @@ if st.session_state.current_scenario:
 
                 ec1, ec2 = st.columns(2)
                 with ec1:
-                    edit_x = st.number_input("Grid X", 0, len(scenario.terrain_map[0])-1, key="editor_x")
+                    edit_x = st.number_input("Grid X", 0, scenario.width-1, key="editor_x")
                 with ec2:
-                    edit_y = st.number_input("Grid Y", 0, len(scenario.terrain_map)-1, key="editor_y")
+                    edit_y = st.number_input("Grid Y", 0, scenario.height-1, key="editor_y")
                 
                 # Context at Coords
                 found_unit = next((u for u in current_frame.unit_positions if u.x == edit_x and u.y == edit_y), None)
-                current_terrain = scenario.terrain_map[edit_y][edit_x]
+                current_terrain = scenario.terrain_map[edit_y, edit_x]
 
                 st.divider()
 
@@ -382,7 +382,8 @@ if st.session_state.current_scenario:
                     st.write("") # Spacer
                     st.write("") 
                     if st.button("Set", key="btn_set_terrain"):
-                        scenario.terrain_map[edit_y][edit_x] = new_terrain
+                        scenario.terrain_map[edit_y, edit_x] = new_terrain
+                        state_manager.mark_scenario_changed()
                         st.rerun()
 
                 st.divider()
@@ -418,7 +419,7 @@ if st.session_state.current_scenario:
                         if found_unit:
                             current_frame.unit_positions.remove(found_unit)
                         
-                        new_unit = ai_handler.Unit(
+                        new_unit = models.Unit(
                             unit_id=st.session_state.u_id_input,
                             side=config.UnitSide(u_side), # Read from variable bound to selectbox
                             type=u_type,
@@ -429,11 +430,13 @@ if st.session_state.current_scenario:
                             status=st.session_state.u_status_input
                         )
                         current_frame.unit_positions.append(new_unit)
+                        state_manager.mark_scenario_changed()
                         st.rerun()
                 with uc4:
                     if found_unit:
                         if st.button("🗑️ Remove Unit", type="secondary"):
                             current_frame.unit_positions.remove(found_unit)
+                            state_manager.mark_scenario_changed()
                             st.rerun()
 
             st.markdown("---")
@@ -451,6 +454,7 @@ if st.session_state.current_scenario:
                             try:
                                 # 1. Truncate
                                 scenario.frames = scenario.frames[:current_idx+1]
+                                state_manager.mark_scenario_changed() # Exports are stale even if generation fails
                                 
                                 # 2. Generate Extension
                                 new_frames = ai_handler.continue_scenario(
@@ -463,6 +467,7 @@ if st.session_state.current_scenario:
                                 
                                 # 3. Append
                                 scenario.frames.extend(new_frames)
+                                state_manager.mark_scenario_changed()
                                 
                                 # Validate Full Scenario
                                 validator.validate_scenario(scenario)
@@ -477,9 +482,13 @@ if st.session_state.current_scenario:
             st.markdown("---")
 
             # Export
-            report_md = exporter.generate_markdown_report(scenario)
-            report_pdf = exporter.generate_pdf_report(scenario)
-            vtt_json = exporter.generate_vtt_json(scenario)
+            md_summary_only = st.checkbox("Summary journal (omit unit tables from the MD export)", value=False)
+            # Memoized per scenario version, so plain reruns (navigation etc.) are free
+            report_md, report_pdf, vtt_json = exporter.build_exports(
+                scenario,
+                st.session_state.scenario_version,
+                md_detail_level='summary' if md_summary_only else 'full'
+            )
             
             col_dl1, col_dl2, col_dl3, col_dl4 = st.columns(4)
             with col_dl1:
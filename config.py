@@ -1,3 +1,4 @@
+import os
 from enum import IntEnum, Enum
 
 # --- Enums ---
@@ -42,6 +43,20 @@ UNIT_ICONS = {
     "default": "⏺️"
 }
 
+# --- Caching (Terrain Generator) ---
+
+# Geocoding results and raw OSM features are kept here between runs
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# --- Fonts (PDF Export) ---
+
+# TrueType fonts for UTF-8 text in PDF reports (DejaVu ships with most Linux
+# distributions). Without the regular and mono faces, reports fall back to the
+# latin-1 core fonts. A missing bold/italic face is replaced by the regular one.
+PDF_FONT_DIR = os.getenv("PDF_FONT_DIR", "/usr/share/fonts/truetype/dejavu")
+PDF_FONT_FILES = {"": "DejaVuSans.ttf", "B": "DejaVuSans-Bold.ttf", "I": "DejaVuSans-Oblique.ttf"}
+PDF_MONO_FONT_FILE = "DejaVuSansMono.ttf"
+
 # --- Doctrines ---
 DOCTRINES = {
     "Generic": "Standard balanced tactics.",
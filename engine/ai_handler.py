@@ -1,19 +1,73 @@
-from typing import List, Optional
-import openai
-from openai import AuthenticationError, RateLimitError, APIConnectionError, APIError
+from functools import lru_cache
+from typing import List
+from openai import Client as OpenAIClient, AuthenticationError, RateLimitError, APIConnectionError, APIError, pydantic_function_tool
 import os
 import json
 import config
+from pydantic import TypeAdapter
 from duckduckgo_search import DDGS
 from engine import validator, terrain_generator, models
 
-# Export models for backward compatibility or direct access via ai_handler
+# Re-exported for backward compatibility; engine.models is the single source of truth
 Unit = models.Unit
 CombatEvent = models.CombatEvent
 Frame = models.Frame
 WargameScenario = models.WargameScenario
 ScenarioExtension = models.ScenarioExtension
 
+# Prompt serializers. Defaults are dropped from the payload to save tokens,
+# so the prompt states them once instead.
+_UNITS_ADAPTER = TypeAdapter(List[Unit])
+_EVENTS_ADAPTER = TypeAdapter(List[CombatEvent])
+_UNIT_DEFAULTS_NOTE = "Omitted unit fields take their defaults: " + ", ".join(
+    f"{name}={field.default!r}" for name, field in Unit.model_fields.items() if not field.is_required()
+)
+
+def _dump_for_prompt(adapter: TypeAdapter, items) -> str:
+    """Compact JSON for prompt injection, without default-valued fields."""
+    return adapter.dump_json(items, exclude_defaults=True).decode()
+
+@lru_cache(maxsize=None)
+def _response_format(model_cls) -> dict:
+    """
+    Strict JSON-schema response format for a Pydantic model, built once.
+    The raw JSON reply is then validated with model_validate_json (pydantic-core
+    parses it directly, no intermediate Python dicts).
+    """
+    schema = pydantic_function_tool(model_cls)["function"]["parameters"]
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model_cls.__name__, "schema": schema, "strict": True},
+    }
+
+@lru_cache(maxsize=64)
+def _doctrine_block(blue_doctrine: str, red_doctrine: str) -> str:
+    """
+    Builds the doctrine instructions for a pair of doctrines.
+    Cached so identical inputs always yield a byte-identical prompt prefix.
+    """
+    b_doc_desc = config.DOCTRINES.get(blue_doctrine, config.DOCTRINES["Generic"])
+    r_doc_desc = config.DOCTRINES.get(red_doctrine, config.DOCTRINES["Generic"])
+    
+    return f"""
+    STRATEGIC DOCTRINE:
+    - BLUE FORCE ({blue_doctrine}): {b_doc_desc}
+    - RED FORCE ({red_doctrine}): {r_doc_desc}
+    
+    You MUST simulate unit behaviors consistent with these doctrines. 
+    (e.g., if 'Deep Battle', Red should mass artillery; if 'Asymmetric', Blue should ambush).
+    """
+
+@lru_cache(maxsize=64)
+def _system_prompt(blue_doctrine: str, red_doctrine: str, has_real_terrain: bool) -> str:
+    """
+    Full system prompt for scenario generation.
+    """
+    system_prompt = config.SYSTEM_PROMPT + "\n" + _doctrine_block(blue_doctrine, red_doctrine)
+    if has_real_terrain:
+        system_prompt += "\nCONSTRAINT: The user has provided a fixed terrain map. You must return this exact terrain map in your response. Focus on placing units and generating tactics."
+    return system_prompt
+
 # --- Logic ---
 
 def search_realtime_intel(query: str, max_results: int = 5) -> str:
@@ -41,7 +95,7 @@ def continue_scenario(api_key: str, current_scenario: WargameScenario, current_f
     if not api_key:
         raise ValueError("OpenAI API Key is missing.")
 
-    client = openai.Client(api_key=api_key)
+    client = OpenAIClient(api_key=api_key)
 
     # Prepare context
     last_frame = current_scenario.frames[current_frame_idx]
@@ -54,7 +108,8 @@ def continue_scenario(api_key: str, current_scenario: WargameScenario, current_f
     {context}
     
     **Current Tactical Situation (Frame {current_frame_idx + 1}):**
-    - Units: {json.dumps([u.model_dump() for u in last_frame.unit_positions])}
+    - Units: {_dump_for_prompt(_UNITS_ADAPTER, last_frame.unit_positions)}
+    - {_UNIT_DEFAULTS_NOTE}
     
     **Task:**
     Generate 5 NEW frames continuing from this exact state. 
@@ -63,16 +118,16 @@ def continue_scenario(api_key: str, current_scenario: WargameScenario, current_f
     """
 
     try:
-        completion = client.beta.chat.completions.parse(
+        completion = client.chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": config.SYSTEM_PROMPT + "\nIMPORTANT: You are CONTINUING an existing battle. Do not regenerate terrain. Only generate the 'frames' list."},
                 {"role": "user", "content": prompt},
             ],
-            response_format=ScenarioExtension,
+            response_format=_response_format(ScenarioExtension),
         )
         
-        extension = completion.choices[0].message.parsed
+        extension = ScenarioExtension.model_validate_json(completion.choices[0].message.content)
         return extension.frames
 
     except Exception as e:
@@ -97,7 +152,6 @@ def fetch_scenario(
     if use_mock:
         try:
             # Load from engine/mock_data.json
-            import os
             current_dir = os.path.dirname(os.path.abspath(__file__))
             mock_path = os.path.join(current_dir, "mock_data.json")
             
@@ -115,7 +169,7 @@ def fetch_scenario(
     if not api_key:
          raise ValueError("OpenAI API Key is missing.")
 
-    client = openai.Client(api_key=api_key)
+    client = OpenAIClient(api_key=api_key)
     
     final_context = context
     real_terrain = None
@@ -149,74 +203,59 @@ def fetch_scenario(
         - Balance the force ratios according to the report.
         """
 
-    # 3. Prompt Construction
-    
-    # Doctrine Injection
-    b_doc_desc = config.DOCTRINES.get(blue_doctrine, config.DOCTRINES["Generic"])
-    r_doc_desc = config.DOCTRINES.get(red_doctrine, config.DOCTRINES["Generic"])
-    
-    doctrine_instruction = f"""
-    STRATEGIC DOCTRINE:
-    - BLUE FORCE ({blue_doctrine}): {b_doc_desc}
-    - RED FORCE ({red_doctrine}): {r_doc_desc}
-    
-    You MUST simulate unit behaviors consistent with these doctrines. 
-    (e.g., if 'Deep Battle', Red should mass artillery; if 'Asymmetric', Blue should ambush).
-    """
-
-    system_prompt = config.SYSTEM_PROMPT + "\n" + doctrine_instruction
+    # 3. Prompt Construction (system prompt incl. doctrine injection is cached)
+    system_prompt = _system_prompt(blue_doctrine, red_doctrine, real_terrain is not None)
     user_prompt = f"Generate a tactical scenario ({map_size}x{map_size} grid) based on this research topic: {final_context}"
     
-    if real_terrain:
+    if real_terrain is not None:
         # Flatten for token efficiency or just dump
-        terrain_str = json.dumps(real_terrain)
+        terrain_str = json.dumps(real_terrain.tolist())
         user_prompt += f"\n\nIMPORTANT: You MUST use the following pre-generated terrain map (0=Open, 1=Water, 2=Urban, 3=Forest). Place units logically within this specific terrain:\n{terrain_str}"
-        system_prompt += "\nCONSTRAINT: The user has provided a fixed terrain map. You must return this exact terrain map in your response. Focus on placing units and generating tactics."
     else:
         user_prompt += f"\nTerrain Style: {terrain_type}"
 
-    messages = [
+    base_messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt},
     ]
+    messages = base_messages
 
     max_retries = 3
     
     for attempt in range(max_retries + 1):
         try:
-            completion = client.beta.chat.completions.parse(
+            completion = client.chat.completions.create(
                 model=model,
                 messages=messages,
-                response_format=WargameScenario,
+                response_format=_response_format(WargameScenario),
             )
             
-            scenario = completion.choices[0].message.parsed
+            raw_json = completion.choices[0].message.content
+            scenario = WargameScenario.model_validate_json(raw_json)
             
             # 4. Enforce Real Terrain (Override AI Hallucination)
-            if real_terrain:
-                scenario.terrain_map = real_terrain
-            
-            # Validate
-            validator.validate_scenario(scenario)
+            if real_terrain is not None:
+                # fetch_terrain_map already returns a validated int8 array, so set it
+                # directly and intentionally skip any assignment validation.
+                object.__setattr__(scenario, 'terrain_map', real_terrain)
             
-            # Collect errors
-            all_errors = []
-            for i, frame in enumerate(scenario.frames):
-                if frame.validation_errors:
-                    for err in frame.validation_errors:
-                        all_errors.append(f"Frame {i+1}: {err}")
+            # Validate (errors are stamped on frames and collected in one pass)
+            has_errors, all_errors = validator.validate_scenario(scenario)
             
             # If valid, return
-            if not all_errors:
+            if not has_errors:
                 return scenario
             
             # If errors and retries remain, loop
             if attempt < max_retries:
                 error_feedback = "The generated scenario contains logic/physics violations. Please fix the following errors and regenerate:\n" + "\n".join(all_errors[:10]) # Limit feedback length
                 
-                # Update history
-                messages.append({"role": "assistant", "content": scenario.model_dump_json()})
-                messages.append({"role": "user", "content": error_feedback})
+                # Replace (not accumulate) the last attempt + feedback pair so every
+                # retry sends the same prompt size and keeps the cached prefix intact.
+                messages = base_messages + [
+                    {"role": "assistant", "content": raw_json},
+                    {"role": "user", "content": error_feedback},
+                ]
                 
                 # Optional: Log to console if visible
                 print(f"Validation failed (Attempt {attempt+1}/{max_retries+1}). Retrying...")
@@ -246,15 +285,16 @@ def ask_commander(api_key: str, scenario: WargameScenario, frame_idx: int, quest
     if not api_key:
         return "Please provide an API Key to use the Commander's Assistant."
         
-    client = openai.Client(api_key=api_key)
+    client = OpenAIClient(api_key=api_key)
     
     frame = scenario.frames[frame_idx]
     
     prompt = f"""
 Current Tactical Situation (Frame {frame_idx + 1}):
     - Description: {frame.frame_description}
-    - Units: {json.dumps([u.model_dump() for u in frame.unit_positions])}
-    - Events: {json.dumps([e.model_dump() for e in frame.combat_log])}
+    - Units: {_dump_for_prompt(_UNITS_ADAPTER, frame.unit_positions)}
+    - {_UNIT_DEFAULTS_NOTE}
+    - Events: {_dump_for_prompt(_EVENTS_ADAPTER, frame.combat_log)}
     
     Question: {question}
     """
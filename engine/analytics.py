@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 import config
+from engine import models
 
 def calculate_force_correlation(scenario):
     """
@@ -9,28 +11,20 @@ def calculate_force_correlation(scenario):
         scenario (WargameScenario): The scenario object.
         
     Returns:
-        pd.DataFrame: DataFrame with columns ['Frame', 'Blue Force', 'Red Force'].
+        pd.DataFrame: DataFrame indexed by 'Frame' (1-based) with columns ['Blue Force', 'Red Force'].
     """
-    data = []
+    matrix, frame_offsets = scenario.positions_matrix()
+    n_frames = len(frame_offsets) - 1
     
-    for i, frame in enumerate(scenario.frames):
-        blue_count = 0
-        red_count = 0
-        
-        if frame.unit_positions:
-            for unit in frame.unit_positions:
-                if unit.side == config.UnitSide.BLUE:
-                    blue_count += 1
-                else:
-                    red_count += 1
-        
-        data.append({
-            'Frame': i + 1,
-            'Blue Force': blue_count,
-            'Red Force': red_count
-        })
-        
-    return pd.DataFrame(data).set_index('Frame')
+    # Frame index of every unit row, then count rows per frame (all / Blue only)
+    row_frame = np.repeat(np.arange(n_frames), np.diff(frame_offsets))
+    total = np.bincount(row_frame, minlength=n_frames)
+    blue = np.bincount(row_frame[matrix[:, 2] == models.SIDE_CODES[config.UnitSide.BLUE]], minlength=n_frames)
+    
+    return pd.DataFrame(
+        {'Blue Force': blue, 'Red Force': total - blue},
+        index=pd.RangeIndex(1, n_frames + 1, name='Frame')
+    )
 
 def calculate_heatmap(scenario):
     """
@@ -40,23 +34,18 @@ def calculate_heatmap(scenario):
         scenario (WargameScenario): The scenario object.
         
     Returns:
-        list[list[int]]: A 2D grid of the same dimensions as the terrain map, 
-                         where values represent the count of units that have occupied that cell.
+        np.ndarray: A 2D integer grid of the same dimensions as the terrain map, 
+                    where values represent the count of units that have occupied that cell.
     """
-    if not scenario.terrain_map:
-        return []
-        
-    height = len(scenario.terrain_map)
-    width = len(scenario.terrain_map[0]) if height > 0 else 0
+    height, width = scenario.height, scenario.width
+    
+    # All unit positions across frames as columns, then accumulate with a
+    # single bincount over flattened cell indices.
+    matrix, _ = scenario.positions_matrix()
+    xs, ys = matrix[:, 0], matrix[:, 1]
     
-    # Initialize zero grid
-    heatmap = [[0 for _ in range(width)] for _ in range(height)]
+    # Ensure units are within bounds (just in case)
+    in_bounds = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+    flat = ys[in_bounds] * width + xs[in_bounds]
     
-    for frame in scenario.frames:
-        if frame.unit_positions:
-            for unit in frame.unit_positions:
-                # Ensure unit is within bounds (just in case)
-                if 0 <= unit.y < height and 0 <= unit.x < width:
-                    heatmap[unit.y][unit.x] += 1
-                    
-    return heatmap
+    return np.bincount(flat, minlength=height * width).reshape(height, width)
@@ -1,21 +1,65 @@
+from functools import lru_cache
+from operator import attrgetter
+import numpy as np
 import plotly.graph_objects as go
 import config
+from engine import models
 
-def render_map(terrain_map, units):
+# Per-unit fields used by the unit layer, fetched as one tuple per unit
+_UNIT_FIELDS = attrgetter('x', 'y', 'side', 'type', 'unit_id', 'health', 'range', 'status')
+
+# Unit hover text: side, unit_id, type, health, range, status
+_TOOLTIP = "<b>{0} - {1}</b> ({2})<br>Health: {3}% | Range: {4}<br>Status: {5}"
+
+# Marker color for each side's unit trace
+_SIDE_COLORS = {config.UnitSide.BLUE: 'blue', config.UnitSide.RED: 'red'}
+
+def _side_codes(sides):
+    """Maps a sequence of UnitSide values to their int8 codes (models.SIDE_CODES)."""
+    return np.fromiter((models.SIDE_CODES[side] for side in sides), dtype=np.int8)
+
+def _side_colors(sides):
+    """Maps a sequence of UnitSide values to 'blue'/'red' marker colors."""
+    codes = _side_codes(sides)
+    return np.where(codes == models.SIDE_CODES[config.UnitSide.BLUE], 'blue', 'red').tolist()
+
+def _id_positions(units):
+    """Returns (unit_ids tuple, (N, 2) int32 array of x, y) for a unit list."""
+    ids = tuple(u.unit_id for u in units)
+    xy = np.fromiter(((u.x, u.y) for u in units), dtype=np.dtype((np.int32, 2)), count=len(ids))
+    return ids, xy
+
+@lru_cache(maxsize=256)
+def _unit_icon(unit_type):
     """
-    Generates a Plotly figure for the tactical map.
+    Resolves a free-form unit type (e.g. 'Mechanized Infantry') to its map icon.
+    The keyword scan over config.UNIT_ICONS runs once per distinct type string.
     """
-    # ... existing render logic ...
-    # Re-implementing simplified version to ensure no regression or creating a separate function?
-    # The user instruction implies adding a NEW function.
-    # But I should check if I can modify the existing one or add a new one.
-    # Let's add render_map_on_mapbox separate for clarity.
-    pass # Replaced by the implementation below.
+    u_type = unit_type.lower()
+    # Dictionary order is insertion ordered, so the first matching keyword wins
+    # (e.g. "infantry" matches "mechanized infantry" before "mechanized" does).
+    for key, icon in config.UNIT_ICONS.items():
+        if key in u_type:
+            return icon
+    return config.UNIT_ICONS["default"]
 
-def render_map_standard(terrain_map, units):
-    # This is the original logic, I need to keep it if I'm not replacing the whole file content.
-    # The tool replaces specific text. I will append the new function.
-    pass 
+@lru_cache(maxsize=4)
+def _build_terrain_trace(terrain_bytes, height, width):
+    """
+    Builds the terrain heatmap layer for an int8 grid given as raw bytes.
+    Terrain rarely changes between frames, so playback reuses this trace;
+    go.Figure copies its input traces, so the cached one is never mutated.
+    """
+    z = np.frombuffer(terrain_bytes, dtype=np.int8).reshape(height, width)
+    # Using discrete colorscale for categorical data
+    return go.Heatmap(
+        z=z,
+        colorscale=config.TERRAIN_COLORSCALE,
+        showscale=False, # Hide color bar
+        zmin=0,
+        zmax=config.TerrainType.FOREST.value,
+        hoverinfo='skip' # Disable hover on terrain for cleaner look
+    )
 
 def render_map_on_mapbox(terrain_map, units, center_lat, center_lon):
     """
@@ -34,66 +78,45 @@ def render_map_on_mapbox(terrain_map, units, center_lat, center_lon):
     # Grid (0,0) is usually Top-Left in 2D arrays, but Plotly Heatmap (0,0) is Bottom-Left.
     # Let's assume (0,0) is Bottom-Left for Cartesian consistency.
     
-    # Generate Terrain Points
-    lats = []
-    lons = []
-    colors = []
-    
-    height = len(terrain_map)
-    width = len(terrain_map[0])
+    # Generate Terrain Points (whole grid at once)
+    terrain = np.asarray(terrain_map)
+    height, width = terrain.shape
     
-    for y in range(height):
-        for x in range(width):
-            t_type = terrain_map[y][x]
-            # Simple mapping
-            # lat = center_lat - (height/2 * scale) + (y * scale)
-            # lon = center_lon - (width/2 * scale) + (x * scale)
-            
-            lat = offset_y + (y * scale)
-            lon = offset_x + (x * scale)
-            
-            lats.append(lat)
-            lons.append(lon)
-            
-            c_val = config.TERRAIN_COLORSCALE[t_type*2][1] # Get hex color
-            colors.append(c_val)
+    # Simple mapping: lat = offset_y + (y * scale), lon = offset_x + (x * scale)
+    yy, xx = np.meshgrid(np.arange(height), np.arange(width), indexing='ij')
+    lats = offset_y + yy * scale
+    lons = offset_x + xx * scale
 
-    fig = go.Figure()
+    traces = []
 
-    # Terrain Layer (Markers)
-    fig.add_trace(go.Scattermapbox(
-        lat=lats,
-        lon=lons,
-        mode='markers',
-        marker=go.scattermapbox.Marker(
-            size=15,
-            color=colors,
-            opacity=0.4,
-            symbol='square' 
-        ),
-        text=[f"Terrain: {t}" for t in colors], # Placeholder
-        hoverinfo='none',
-        name='Terrain'
-    ))
+    # Terrain Layer (Markers), one solid-color trace per terrain class
+    for t_type in config.TerrainType:
+        mask = terrain == t_type.value
+        if not mask.any():
+            continue
+        
+        traces.append(go.Scattermapbox(
+            lat=lats[mask],
+            lon=lons[mask],
+            mode='markers',
+            marker=go.scattermapbox.Marker(
+                size=15,
+                color=config.TERRAIN_COLORSCALE[t_type.value * 2][1], # Get hex color
+                opacity=0.4,
+                symbol='square' 
+            ),
+            hoverinfo='none',
+            name=f"Terrain: {t_type.name.title()}"
+        ))
 
     # Unit Layer
     if units:
-        u_lats = []
-        u_lons = []
-        u_texts = []
-        u_colors = []
-        
-        for unit in units:
-            lat = offset_y + (unit.y * scale)
-            lon = offset_x + (unit.x * scale)
-            u_lats.append(lat)
-            u_lons.append(lon)
-            u_texts.append(f"{unit.side.value} {unit.type}")
-            
-            color = 'blue' if unit.side == config.UnitSide.BLUE else 'red'
-            u_colors.append(color)
+        u_lats = offset_y + np.fromiter((unit.y for unit in units), dtype=float) * scale
+        u_lons = offset_x + np.fromiter((unit.x for unit in units), dtype=float) * scale
+        u_texts = [f"{unit.side.value} {unit.type}" for unit in units]
+        u_colors = _side_colors(unit.side for unit in units)
 
-        fig.add_trace(go.Scattermapbox(
+        traces.append(go.Scattermapbox(
             lat=u_lats,
             lon=u_lons,
             mode='markers+text',
@@ -102,13 +125,13 @@ def render_map_on_mapbox(terrain_map, units, center_lat, center_lon):
                 color=u_colors,
                 symbol='circle'
             ),
-            text=[config.UNIT_ICONS.get(u.type.lower(), "X") for u in units],
+            text=[_unit_icon(u.type) for u in units],
             textposition="top center",
             hovertext=u_texts,
             name='Units'
         ))
 
-    fig.update_layout(
+    layout = dict(
         mapbox=dict(
             style="open-street-map",
             center=dict(lat=center_lat, lon=center_lon),
@@ -119,14 +142,15 @@ def render_map_on_mapbox(terrain_map, units, center_lat, center_lon):
         showlegend=False
     )
     
-    return fig
+    # Build the figure in one shot (single validation pass)
+    return go.Figure(data=traces, layout=layout)
 
 def render_map(terrain_map, units, previous_units=None, show_arrows=True, show_labels=True):
     """
     Generates a Plotly figure for the tactical map.
     
     Args:
-        terrain_map (list of list of int): N x M grid.
+        terrain_map (np.ndarray): N x M int8 terrain grid.
         units (list of objects): List of units for the current frame. 
                                  Expected attrs: unit_id, side, x, y, type.
         previous_units (list of objects, optional): List of units from the previous frame.
@@ -138,117 +162,101 @@ def render_map(terrain_map, units, previous_units=None, show_arrows=True, show_l
     """
     
     # Calculate dimensions
-    map_height = len(terrain_map)
-    map_width = len(terrain_map[0]) if map_height > 0 else 20
+    map_height, map_width = terrain_map.shape
     
-    # 1. Base Layer: Terrain Heatmap
-    # Using discrete colorscale for categorical data
-    fig = go.Figure()
-
-    fig.add_trace(go.Heatmap(
-        z=terrain_map,
-        colorscale=config.TERRAIN_COLORSCALE,
-        showscale=False, # Hide color bar
-        zmin=0,
-        zmax=config.TerrainType.FOREST.value,
-        hoverinfo='skip' # Disable hover on terrain for cleaner look
-    ))
+    # 1. Base Layer: Terrain Heatmap (cached on the grid contents)
+    traces = [_build_terrain_trace(terrain_map.tobytes(), map_height, map_width)]
 
     # 1.5. Movement Vectors (Arrows)
     if show_arrows and previous_units and units:
-        prev_map = {u.unit_id: u for u in previous_units}
+        prev_ids, prev_xy = _id_positions(previous_units)
+        cur_ids, cur_xy = _id_positions(units)
         
-        for unit in units:
-            if unit.unit_id in prev_map:
-                prev = prev_map[unit.unit_id]
-                # Check if moved
-                if prev.x != unit.x or prev.y != unit.y:
-                    # Add arrow
-                    fig.add_annotation(
-                        x=unit.x,
-                        y=unit.y,
-                        ax=prev.x,
-                        ay=prev.y,
-                        xref="x",
-                        yref="y",
-                        axref="x",
-                        ayref="y",
-                        showarrow=True,
-                        arrowhead=2,
-                        arrowsize=1,
-                        arrowwidth=2,
-                        arrowcolor="white",
-                        opacity=0.6
-                    )
+        # Frames usually list the same units in the same order, so rows pair
+        # up directly. Otherwise (units added/removed/reordered) align by id.
+        if prev_ids != cur_ids:
+            slot = {unit_id: i for i, unit_id in enumerate(prev_ids)}
+            idx = np.fromiter((slot.get(unit_id, -1) for unit_id in cur_ids), dtype=np.int64, count=len(cur_ids))
+            known = idx >= 0
+            prev_xy, cur_xy = prev_xy[idx[known]], cur_xy[known]
+        
+        # (prev_x, prev_y, x, y) for every unit that moved
+        moved = (prev_xy != cur_xy).any(axis=1)
+        moves = np.hstack([prev_xy[moved], cur_xy[moved]]).astype(float)
+        
+        if len(moves):
+            # All arrows as one polyline: [x0, x1, NaN, ...] (NaN breaks the line)
+            gaps = np.full(len(moves), np.nan)
+            traces.append(go.Scatter(
+                x=np.column_stack([moves[:, 0], moves[:, 2], gaps]).ravel(),
+                y=np.column_stack([moves[:, 1], moves[:, 3], gaps]).ravel(),
+                mode='lines',
+                line=dict(color='white', width=2),
+                opacity=0.6,
+                hoverinfo='skip',
+                showlegend=False
+            ))
+            # Arrowheads at the destination, rotated clockwise from 'up'
+            traces.append(go.Scatter(
+                x=moves[:, 2],
+                y=moves[:, 3],
+                mode='markers',
+                marker=dict(
+                    symbol='arrow',
+                    size=12,
+                    color='white',
+                    angle=np.degrees(np.arctan2(moves[:, 2] - moves[:, 0], moves[:, 3] - moves[:, 1]))
+                ),
+                opacity=0.6,
+                hoverinfo='skip',
+                showlegend=False
+            ))
 
     # 2. Overlay: Units
     if units:
-        x_vals = []
-        y_vals = []
-        texts = []
-        colors = []
-        hover_texts = []
+        # Pull every field in one C-level pass per unit, then unzip into columns.
+        # Plotly Heatmap x/y align with indices (0-19 for 20x20).
+        (x_vals, y_vals, sides, types, unit_ids,
+         healths, ranges, statuses) = zip(*map(_UNIT_FIELDS, units))
         
-        for unit in units:
-            # Check for coordinates, adjust for 0-indexed logic if needed. 
-            # Assuming 0-19 for 20x20. Plotly Heatmap x/y align with indices.
-            x_vals.append(unit.x)
-            y_vals.append(unit.y)
-            
-            # Side Color Logic
-            if unit.side == config.UnitSide.BLUE:
-                color = 'blue'
-            else:
-                color = 'red'
-            
-            # Icon Logic
-            u_type = unit.type.lower()
-            symbol = config.UNIT_ICONS["default"]
-            
-            # Check for matches in our dictionary keys
-            for key, icon in config.UNIT_ICONS.items():
-                if key in u_type:
-                    symbol = icon
-                    # Prioritize specific matches? loop order matters. 
-                    # Dictionary order is insertion ordered in modern Python.
-                    # Given the list, "infantry" will match "mechanized infantry" if "infantry" is checked first.
-                    # So we should probably check longer words or specific types if needed, 
-                    # but simple iteration is okay for now. 
-                    # If we want "mechanized infantry" to be "mechanized", we should put "mechanized" first or break.
-                    break 
-
-            texts.append(symbol)
-            colors.append(color)
-            
-            # Expanded Tooltip
-            tooltip = (
-                f"<b>{unit.side.value} - {unit.unit_id}</b> ({unit.type})<br>"
-                f"Health: {unit.health}% | Range: {unit.range}<br>"
-                f"Status: {unit.status}"
-            )
-            hover_texts.append(tooltip)
+        x_vals = np.asarray(x_vals)
+        y_vals = np.asarray(y_vals)
+        codes = _side_codes(sides)
+        texts = np.array([_unit_icon(u_type) for u_type in types], dtype=object) # Memoized per unit type
+        
+        # Expanded Tooltip, formatted column-wise from one template
+        hover_texts = np.array(list(map(
+            _TOOLTIP.format,
+            [side.value for side in sides], unit_ids, types, healths, ranges, statuses
+        )), dtype=object)
 
         mode_settings = 'markers+text' if show_labels else 'markers'
 
-        fig.add_trace(go.Scatter(
-            x=x_vals,
-            y=y_vals,
-            mode=mode_settings,
-            text=texts,
-            textfont=dict(size=20, color='black'), # Black icons for contrast
-            marker=dict(
-                size=30,
-                color=colors,
-                opacity=0.5, # Transparent bubble to show terrain/grid slightly
-                line=dict(width=1, color='white')
-            ),
-            hoverinfo='text',
-            hovertext=hover_texts,
-            showlegend=False
-        ))
+        # One solid-color WebGL trace per side, so each side draws in one batch
+        for side, color in _SIDE_COLORS.items():
+            mask = codes == models.SIDE_CODES[side]
+            if not mask.any():
+                continue
+            traces.append(go.Scattergl(
+                x=x_vals[mask],
+                y=y_vals[mask],
+                mode=mode_settings,
+                text=texts[mask],
+                textfont=dict(size=20, color='black'), # Black icons for contrast
+                marker=dict(
+                    size=30,
+                    color=color,
+                    opacity=0.5, # Transparent bubble to show terrain/grid slightly
+                    line=dict(width=1, color='white')
+                ),
+                hoverinfo='text',
+                hovertext=hover_texts[mask],
+                name=side.value,
+                showlegend=False
+            ))
 
     # 3. Styling
-    fig.update_layout(
+    layout = dict(
         width=600,
         height=600,
         margin=dict(l=10, r=10, t=10, b=10),
@@ -270,21 +278,21 @@ def render_map(terrain_map, units, previous_units=None, show_arrows=True, show_l
         paper_bgcolor='rgba(0,0,0,0)', # Transparent background
         plot_bgcolor='rgba(0,0,0,0)'
     )
+    
+    # Build the figure in one shot (single validation pass)
+    return go.Figure(data=traces, layout=layout)
 
 def render_accumulated_heatmap(heatmap_grid):
     """
     Renders a heatmap of accumulated unit positions.
     """
-    height = len(heatmap_grid)
-    width = len(heatmap_grid[0]) if height > 0 else 20
-    
-    fig = go.Figure(data=go.Heatmap(
-        z=heatmap_grid,
-        colorscale='Hot',
-        showscale=True
-    ))
+    # Keep the grid as a NumPy array: Plotly ships it to the browser as a typed
+    # (binary) array, which the heatmap draws as a single canvas raster.
+    heatmap = np.asarray(heatmap_grid)
+    height = heatmap.shape[0]
+    width = heatmap.shape[1] if height > 0 else 20
     
-    fig.update_layout(
+    layout = dict(
         width=600,
         height=600,
         margin=dict(l=10, r=10, t=10, b=10),
@@ -302,4 +310,12 @@ def render_accumulated_heatmap(heatmap_grid):
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)'
     )
-    return fig
+    
+    return go.Figure(
+        data=[go.Heatmap(
+            z=heatmap,
+            colorscale='Hot',
+            showscale=True
+        )],
+        layout=layout
+    )
@@ -1,7 +1,90 @@
-from pydantic import BaseModel, Field
-from typing import List, Literal, Optional
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from pydantic import BaseModel, Field, PlainSerializer, PlainValidator, PrivateAttr, WithJsonSchema
+from typing import Annotated, List, Literal, NamedTuple, Optional
+import numpy as np
 import config
 
+# Integer codes for UnitSide in array views (BLUE = 0, RED = 1)
+SIDE_CODES = {side: code for code, side in enumerate(config.UnitSide)}
+SIDES = tuple(config.UnitSide) # Inverse of SIDE_CODES: SIDES[code] -> UnitSide
+# Report label per side code (str(UnitSide), as the reports have always shown)
+SIDE_LABELS = tuple(str(side) for side in SIDES)
+
+def _as_terrain_array(value) -> np.ndarray:
+    """
+    Coerces a terrain matrix (nested lists or ndarray) into a 2D int8 array.
+    The result is always C-contiguous: one flat row-major buffer of H*W bytes
+    (cell (x, y) at offset y * W + x), as tobytes() keys and orjson expect.
+    Ragged rows are padded with open ground or trimmed to the first row's
+    width: the JSON schema cannot force equal lengths, and the AI's map is
+    often replaced by real terrain anyway.
+    """
+    if isinstance(value, (list, tuple)) and value and all(isinstance(row, (list, tuple)) for row in value):
+        width = len(value[0])
+        if any(len(row) != width for row in value):
+            value = [list(row[:width]) + [config.TerrainType.OPEN.value] * (width - len(row)) for row in value]
+    try:
+        values = np.asarray(value)
+        with np.errstate(invalid="ignore"): # NaN/inf are caught by the round trip below
+            grid = np.ascontiguousarray(values, dtype=np.int8)
+    except (OverflowError, TypeError) as e:
+        raise ValueError(f"terrain_map must contain small integers ({e})")
+    # The cast truncates floats (1.7 -> 1) and wraps wide ints (300 -> 44);
+    # only accept values that survive it unchanged
+    if not np.array_equal(grid, values):
+        raise ValueError("terrain_map must contain small integers")
+    if grid.size == 0:
+        return grid.reshape(0, 0)
+    if grid.ndim != 2:
+        raise ValueError("terrain_map must be a 2D matrix")
+    return grid
+
+# Terrain is held as a compact int8 array in memory but still validates from,
+# serializes to and advertises itself (JSON schema) as a list of lists of ints.
+TerrainMap = Annotated[
+    np.ndarray,
+    PlainValidator(_as_terrain_array),
+    PlainSerializer(lambda grid: grid.tolist(), return_type=List[List[int]]),
+    WithJsonSchema({"type": "array", "items": {"type": "array", "items": {"type": "integer"}}}),
+]
+
+class UnitArrays(NamedTuple):
+    """Structure-of-arrays view of a frame's units (one entry per unit, same order)."""
+    x: np.ndarray        # int32
+    y: np.ndarray        # int32
+    side: np.ndarray     # int8, see SIDE_CODES
+    unit_id: np.ndarray  # object (str)
+
+class UnitTracks(NamedTuple):
+    """Unit positions aligned by unit_id across all frames of a scenario."""
+    unit_ids: list        # Track order (order of first appearance)
+    id_index: dict        # unit_id -> track column
+    xy: np.ndarray        # (F, N, 2) int32 positions
+    rows: np.ndarray      # (F, N) int64 row of the unit in frame f, -1 if absent
+    order: np.ndarray     # (F, N) int64 rank of the unit's first row in frame f, -1 if absent
+
+@dataclass(frozen=True, slots=True)
+class UnitRecord:
+    """
+    Lightweight read-only copy of a Unit for hot render loops
+    (slot attribute reads, no per-instance __dict__ or validation).
+    """
+    unit_id: str
+    side: config.UnitSide
+    type: str
+    x: int
+    y: int
+    health: int
+    range: int
+    status: str
+
+_RECORD_FIELDS = attrgetter(*(f.name for f in fields(UnitRecord)))
+
+# Bumped by every in-place Unit field assignment. Frame views remember the
+# value they were built at, so editing any unit makes them rebuild.
+_unit_edits = 0
+
 class Unit(BaseModel):
     unit_id: str = Field(..., description="Unique identifier for the unit (e.g., 'A-1', 'B-Tank').")
     side: config.UnitSide = Field(..., description="The side the unit belongs to.")
@@ -12,6 +95,11 @@ class Unit(BaseModel):
     range: int = Field(1, ge=1, description="Effective firing range in grid cells.")
     status: str = Field("Active", description="Current tactical status (e.g., 'Moving', 'Engaged', 'Digging In').")
 
+    def __setattr__(self, name, value):
+        global _unit_edits
+        super().__setattr__(name, value)
+        _unit_edits += 1
+
 class CombatEvent(BaseModel):
     source_unit_id: str = Field(..., description="ID of the unit initiating the action.")
     target_unit_id: Optional[str] = Field(None, description="ID of the target unit, if applicable.")
@@ -25,9 +113,155 @@ class Frame(BaseModel):
     combat_log: List[CombatEvent] = Field(default_factory=list, description="List of specific tactical events occurring in this frame.")
     validation_errors: List[str] = Field(default_factory=list, description="Logic/Physics violations detected in this frame.")
 
+    # (unit edit count, unit_positions snapshot, {name: view}); see _view
+    _views: Optional[tuple] = PrivateAttr(default=None)
+
+    def __eq__(self, other):
+        # Compare the model fields only, not the cached views.
+        if not isinstance(other, Frame):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in type(self).model_fields)
+
+    def _view(self, name, build):
+        """
+        Returns the cached view `name`, calling build(self) on first access.
+        All views are dropped once unit_positions holds other units (reassigned
+        or edited in place) or any Unit field has been assigned since.
+        """
+        units = self.unit_positions
+        cached = self._views
+        if cached is None or cached[0] != _unit_edits or cached[1] != units:
+            cached = self._views = (_unit_edits, list(units), {})
+        views = cached[2]
+        if name not in views:
+            views[name] = build(self)
+        return views[name]
+
+    @property
+    def soa(self) -> UnitArrays:
+        """Array view of unit_positions for the validator, analytics and reports."""
+        return self._view('soa', _build_soa)
+
+    @property
+    def records(self) -> tuple:
+        """unit_positions as UnitRecords (same order), for the map renderer."""
+        return self._view('records', _build_records)
+
+    @property
+    def unit_labels(self) -> tuple:
+        """
+        Display strings (unit_ids, sides, positions) of the units, shared by
+        the markdown and PDF reports.
+        """
+        return self._view('unit_labels', _build_unit_labels)
+
+    def invalidate_views(self):
+        """Drops cached views now (edits are also detected automatically)."""
+        self._views = None
+
+def _build_soa(frame) -> UnitArrays:
+    units = frame.unit_positions
+    rows = np.fromiter(
+        ((u.x, u.y, SIDE_CODES[u.side]) for u in units),
+        dtype=np.dtype((np.int32, 3)), count=len(units)
+    ).reshape(-1, 3)
+    unit_ids = np.fromiter((u.unit_id for u in units), dtype=object, count=len(units))
+    return UnitArrays(x=rows[:, 0], y=rows[:, 1], side=rows[:, 2].astype(np.int8), unit_id=unit_ids)
+
+def _build_records(frame) -> tuple:
+    return tuple(UnitRecord(*_RECORD_FIELDS(u)) for u in frame.unit_positions)
+
+def _build_unit_labels(frame) -> tuple:
+    soa = frame.soa
+    return (
+        tuple(soa.unit_id),
+        tuple(SIDE_LABELS[code] for code in soa.side.tolist()),
+        tuple(f"({x}, {y})" for x, y in zip(soa.x.tolist(), soa.y.tolist())),
+    )
+
 class WargameScenario(BaseModel):
-    terrain_map: List[List[int]] = Field(..., description="N x N integer matrix representing terrain. 0: Open, 1: Water, 2: Urban, 3: Forest.")
+    terrain_map: TerrainMap = Field(..., description="N x N integer matrix representing terrain. 0: Open, 1: Water, 2: Urban, 3: Forest.")
     frames: List[Frame] = Field(..., description="Sequential frames depicting the tactical movement.")
+    # (frame soa views, UnitTracks built from them); see unit_tracks
+    _unit_tracks: Optional[tuple] = PrivateAttr(default=None)
+
+    def __eq__(self, other):
+        # The default field-wise comparison is ambiguous for ndarray fields.
+        if not isinstance(other, WargameScenario):
+            return NotImplemented
+        return np.array_equal(self.terrain_map, other.terrain_map) and self.frames == other.frames
+
+    # terrain_map is converted to an int8 array once, at validation, so the
+    # dimensions are plain shape reads rather than nested-list len() calls.
+    @property
+    def height(self) -> int:
+        """Number of terrain rows (y extent)."""
+        return self.terrain_map.shape[0]
+
+    @property
+    def width(self) -> int:
+        """Number of terrain columns (x extent)."""
+        return self.terrain_map.shape[1]
+
+    def positions_matrix(self):
+        """
+        Stacks every frame's unit arrays into one matrix.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: A (total_units, 3) int32 matrix of
+                (x, y, side) rows, and CSR-style frame_offsets so that frame i
+                occupies rows frame_offsets[i]:frame_offsets[i + 1].
+        """
+        views = [frame.soa for frame in self.frames]
+        frame_offsets = np.zeros(len(views) + 1, dtype=np.int64)
+        np.cumsum([len(v.x) for v in views], out=frame_offsets[1:])
+
+        matrix = np.empty((frame_offsets[-1], 3), dtype=np.int32)
+        for view, start, end in zip(views, frame_offsets[:-1], frame_offsets[1:]):
+            matrix[start:end, 0] = view.x
+            matrix[start:end, 1] = view.y
+            matrix[start:end, 2] = view.side
+        return matrix, frame_offsets
+
+    def unit_tracks(self) -> UnitTracks:
+        """
+        Aligns every frame's units by unit_id. If an id repeats within a frame
+        its last row gives the position, but order ranks it by its first row.
+        The id -> column map and position tensor are cached and reused as long
+        as every frame's soa view is unchanged, so unit edits and replaced
+        frames are picked up automatically.
+        """
+        views = [frame.soa for frame in self.frames]
+        cached = self._unit_tracks
+        if cached is not None and len(cached[0]) == len(views) and all(a is b for a, b in zip(cached[0], views)):
+            return cached[1]
+
+        slots = [{unit_id: i for i, unit_id in enumerate(view.unit_id)} for view in views]
+        id_index = {}
+        for slot in slots:
+            for unit_id in slot:
+                id_index.setdefault(unit_id, len(id_index))
+
+        xy = np.zeros((len(views), len(id_index), 2), dtype=np.int32)
+        rows = np.full((len(views), len(id_index)), -1, dtype=np.int64)
+        order = np.full_like(rows, -1)
+        for f, (view, slot) in enumerate(zip(views, slots)):
+            cols = np.fromiter((id_index[unit_id] for unit_id in slot), dtype=np.int64, count=len(slot))
+            r = np.fromiter(slot.values(), dtype=np.int64, count=len(slot))
+            xy[f, cols, 0] = view.x[r]
+            xy[f, cols, 1] = view.y[r]
+            rows[f, cols] = r
+            order[f, cols] = np.arange(len(slot)) # Dict keys keep first-insertion order
+
+        tracks = UnitTracks(unit_ids=list(id_index), id_index=id_index, xy=xy, rows=rows, order=order)
+        self._unit_tracks = (views, tracks)
+        return tracks
+
+    def invalidate_views(self):
+        """Drops cached views of every frame now (see Frame.invalidate_views)."""
+        self._unit_tracks = None
+        for frame in self.frames:
+            frame.invalidate_views()
 
 class ScenarioExtension(BaseModel):
     frames: List[Frame] = Field(..., description="Sequential frames continuing the tactical movement.")
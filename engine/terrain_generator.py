@@ -1,22 +1,201 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import overpy
 import numpy as np
 from geopy.geocoders import Nominatim
 import config
 import time
 
+# Returned by _cache_load when there is no usable entry (None is a valid value)
+_MISS = object()
+
+def _cache_path(kind, key, ext):
+    """
+    Disk cache location for a lookup, e.g. .cache/geocode/<sha1>.json.
+    """
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(config.CACHE_DIR, kind, f"{digest}.{ext}")
+
+def _cache_load(kind, key, ext, load):
+    """
+    Reads a cache entry with load(file). Returns _MISS if the entry is missing
+    or unreadable, so callers simply fall through to the network.
+    """
+    try:
+        with open(_cache_path(kind, key, ext), "rb") as f:
+            return load(f)
+    except Exception:
+        return _MISS
+
+def _cache_store(kind, key, ext, write):
+    """
+    Best-effort cache write via a unique temp file + rename, so concurrent
+    writers (Streamlit sessions are threads) never share a temp file and
+    readers never see partial files. Failures are reported and ignored:
+    the caller keeps its freshly fetched result either way.
+    """
+    tmp_path = None
+    try:
+        folder = os.path.join(config.CACHE_DIR, kind)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, _cache_path(kind, key, ext))
+    except Exception as e:
+        print(f"Cache write error: {e}")
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def _load_npz(f):
+    with np.load(f) as data:
+        return {key: data[key] for key in data.files}
+
+@lru_cache(maxsize=256)
+def _geocode(location_name):
+    """
+    Geocodes with an in-memory and on-disk cache.
+    Network errors propagate and are therefore never cached.
+    """
+    cached = _cache_load("geocode", location_name, "json", json.load)
+    if cached is not _MISS:
+        return tuple(cached) if cached else None
+
+    geolocator = Nominatim(user_agent="wargame_researcher_v1")
+    location = geolocator.geocode(location_name)
+    coords = (location.latitude, location.longitude) if location else None
+    _cache_store("geocode", location_name, "json", lambda f: f.write(json.dumps(coords).encode("utf-8")))
+    return coords
+
 def get_coordinates(location_name):
     """
     Geocodes the location name to lat/lon.
     """
-    geolocator = Nominatim(user_agent="wargame_researcher_v1")
     try:
-        location = geolocator.geocode(location_name)
-        if location:
-            return location.latitude, location.longitude
+        return _geocode(location_name)
     except Exception as e:
         print(f"Geocoding error: {e}")
     return None
 
+def _classify_way(tags):
+    """
+    Maps OSM tags to a terrain value.
+    """
+    if "water" in tags.get("natural", "") or "riverbank" in tags.get("waterway", ""):
+        return config.TerrainType.WATER.value
+    elif "forest" in tags.get("landuse", "") or "wood" in tags.get("natural", ""):
+        return config.TerrainType.FOREST.value
+    elif "residential" in tags.get("landuse", "") or "industrial" in tags.get("landuse", "") or "building" in tags:
+        return config.TerrainType.URBAN.value
+    return config.TerrainType.OPEN.value
+
+def _load_osm_ways(query):
+    """
+    Runs the Overpass query and flattens the returned ways into compact arrays.
+    Results are cached on disk (npz), so repeat lookups skip both the HTTP
+    request and response parsing. The query text (which embeds the bounding
+    box) is the cache key. Empty results are not cached: a server timeout or
+    remark can come back as an empty response without overpy raising.
+    
+    Returns:
+        dict[str, np.ndarray]: 'lats', 'lons' (all nodes, way after way),
+            'way_offsets' (way i spans way_offsets[i]:way_offsets[i + 1]),
+            'tag_codes' (terrain value per way) and 'closed' (area ways).
+    """
+    cached = _cache_load("overpass", query, "npz", _load_npz)
+    if cached is not _MISS:
+        return cached
+
+    result = overpy.Overpass().query(query)
+
+    lats, lons, way_offsets, tag_codes, closed = [], [], [0], [], []
+    for way in result.ways:
+        nodes = way.nodes
+        lats.extend(float(n.lat) for n in nodes)
+        lons.extend(float(n.lon) for n in nodes)
+        way_offsets.append(len(lats))
+        tag_codes.append(_classify_way(way.tags))
+        closed.append(len(nodes) > 3 and nodes[0].id == nodes[-1].id)
+
+    ways = {
+        "lats": np.array(lats, dtype=np.float64),
+        "lons": np.array(lons, dtype=np.float64),
+        "way_offsets": np.array(way_offsets, dtype=np.int64),
+        "tag_codes": np.array(tag_codes, dtype=np.int8),
+        "closed": np.array(closed, dtype=bool),
+    }
+    if tag_codes:
+        _cache_store("overpass", query, "npz", lambda f: np.savez_compressed(f, **ways))
+    return ways
+
+def _fill_polygon(grid, xs, ys, t_type):
+    """
+    Fills every cell whose center lies inside a closed polygon (even-odd rule).
+
+    Args:
+        grid (np.ndarray): Terrain grid, modified in place.
+        xs, ys (np.ndarray): Vertices of the closed ring in continuous grid
+                             coordinates (cell (row, col) spans [row, row+1) x [col, col+1)).
+        t_type (int): Terrain value to write.
+    """
+    rows, cols = grid.shape
+    # Only test cells inside the polygon's bounding box
+    c0, c1 = max(int(np.floor(xs.min())), 0), min(int(np.ceil(xs.max())), cols)
+    r0, r1 = max(int(np.floor(ys.min())), 0), min(int(np.ceil(ys.max())), rows)
+    if c0 >= c1 or r0 >= r1:
+        return
+
+    cy, cx = np.mgrid[r0:r1, c0:c1] + 0.5
+    px = cx.reshape(-1, 1)
+    py = cy.reshape(-1, 1)
+    x1, y1, x2, y2 = xs[:-1], ys[:-1], xs[1:], ys[1:]
+
+    # Ray casting for all (cell center, edge) pairs at once
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crosses = ((y1 > py) != (y2 > py)) & (px < (x2 - x1) * (py - y1) / (y2 - y1) + x1)
+    inside = (crosses.sum(axis=1) % 2 == 1).reshape(r1 - r0, c1 - c0)
+
+    grid[r0:r1, c0:c1][inside] = t_type
+
+def _rasterize_path(grid, xs, ys, t_type):
+    """
+    Draws a polyline through integer cell coordinates (vertices included).
+    Each segment is sampled max(|dx|, |dy|) times by linear interpolation;
+    all samples of all segments are generated in one vectorized pass.
+    Later cells simply overwrite earlier ones; no terrain precedence.
+
+    Args:
+        grid (np.ndarray): Terrain grid, modified in place.
+        xs, ys (np.ndarray): Integer cell coordinates of the vertices.
+        t_type (int): Terrain value to write.
+    """
+    if len(xs) == 0:
+        return
+    x0, y0 = xs[:-1], ys[:-1]
+    dx, dy = xs[1:] - x0, ys[1:] - y0
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+
+    # Segment index and step number of every interpolated sample
+    seg = np.repeat(np.arange(len(steps)), steps)
+    step = np.arange(len(seg)) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = step / steps[seg]
+
+    # Interpolated samples plus the vertices themselves; astype truncates
+    # toward zero like int() did in the old per-step loop.
+    px = np.concatenate([(x0[seg] + dx[seg] * t).astype(np.int64), xs])
+    py = np.concatenate([(y0[seg] + dy[seg] * t).astype(np.int64), ys])
+
+    rows, cols = grid.shape
+    inside = (px >= 0) & (px < cols) & (py >= 0) & (py < rows)
+    grid[py[inside], px[inside]] = t_type
+
 def fetch_terrain_map(location_name, grid_size=20, cell_size_meters=100):
     """
     Generates a 20x20 grid based on real OSM data.
@@ -27,12 +206,13 @@ def fetch_terrain_map(location_name, grid_size=20, cell_size_meters=100):
         cell_size_meters (int): Real-world size of one grid cell.
     
     Returns:
-        list[list[int]]: The terrain matrix.
+        np.ndarray: The terrain matrix (grid_size x grid_size, int8), ready to
+                    be assigned to WargameScenario.terrain_map.
     """
     coords = get_coordinates(location_name)
     if not coords:
         # Fallback to empty map if location not found
-        return [[config.TerrainType.OPEN.value] * grid_size for _ in range(grid_size)]
+        return np.full((grid_size, grid_size), config.TerrainType.OPEN.value, dtype=np.int8)
     
     lat, lon = coords
     
@@ -48,8 +228,6 @@ def fetch_terrain_map(location_name, grid_size=20, cell_size_meters=100):
     west = lon - lon_delta
     east = lon + lon_delta
     
-    api = overpy.Overpass()
-    
     # Query for features
     # optimizing query to get ways and relations (polygons)
     # [out:json];
@@ -81,67 +259,46 @@ def fetch_terrain_map(location_name, grid_size=20, cell_size_meters=100):
     out body;
     """
     
-    try:
-        result = api.query(query)
-    except Exception as e:
-        print(f"Overpass API error: {e}")
-        return [[config.TerrainType.OPEN.value] * grid_size for _ in range(grid_size)]
+    # The Overpass request dominates latency; issue it in the background
+    # and prepare the grid while it is in flight.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending_ways = executor.submit(_load_osm_ways, query)
+
+        # Initialize Grid (0 = Open)
+        grid = np.zeros((grid_size, grid_size), dtype=np.int8)
+        lon_scale = grid_size / (east - west)
+        lat_scale = grid_size / (north - south)
 
-    # Initialize Grid (0 = Open)
-    grid = np.zeros((grid_size, grid_size), dtype=int)
+        try:
+            ways = pending_ways.result()
+        except Exception as e:
+            print(f"Overpass API error: {e}")
+            return np.full((grid_size, grid_size), config.TerrainType.OPEN.value, dtype=np.int8)
     
-    # Helper to map lat/lon to grid x/y
-    def to_grid(lat_p, lon_p):
-        y = int((lat_p - south) / (north - south) * grid_size)
-        x = int((lon_p - west) / (east - west) * grid_size)
-        # Flip Y because grid 0,0 is usually top-left, but lat increases upwards.
-        # Actually, let's keep it standard Cartesian (0,0 bottom left) for calculation 
-        # then flip at end if needed. Or just match typical array indexing where 0 is top.
-        # Let's use 0 = Top (North) to match the UI map usually.
-        # So Lat North = Index 0. Lat South = Index N.
-        y_inv = grid_size - 1 - y
-        return x, y_inv
+    # Map every node to grid coordinates in one vectorized pass.
+    # Continuous coordinates (0..grid_size) are used for polygon fill.
+    gx = (ways["lons"] - west) * lon_scale
+    gy = (ways["lats"] - south) * lat_scale
+    # Cell indices: flip Y because lat increases upwards but row 0 is the top
+    # of the UI map (Lat North = Index 0, Lat South = Index N). Out-of-range
+    # nodes are kept as-is so lines crossing the box keep their true slope.
+    node_xs = gx.astype(np.int32)
+    node_ys = grid_size - 1 - gy.astype(np.int32)
 
     # Rasterize Ways
-    for way in result.ways:
-        tags = way.tags
-        t_type = config.TerrainType.OPEN.value
+    way_offsets = ways["way_offsets"]
+    for start, end, t_type, is_closed in zip(way_offsets[:-1], way_offsets[1:], ways["tag_codes"], ways["closed"]):
+        # Untagged ways (e.g. relation member rings) classify as OPEN; the grid
+        # already starts OPEN, so drawing them would only erase other features.
+        if t_type == config.TerrainType.OPEN.value:
+            continue
         
-        if "water" in tags.get("natural", "") or "riverbank" in tags.get("waterway", ""):
-            t_type = config.TerrainType.WATER.value
-        elif "forest" in tags.get("landuse", "") or "wood" in tags.get("natural", ""):
-            t_type = config.TerrainType.FOREST.value
-        elif "residential" in tags.get("landuse", "") or "industrial" in tags.get("landuse", "") or "building" in tags:
-            t_type = config.TerrainType.URBAN.value
+        # Closed ways (lakes, woods, blocks) are areas: fill their interior.
+        if is_closed:
+            _fill_polygon(grid, gx[start:end], grid_size - gy[start:end], t_type)
         
-        # Simple point sampling for the way nodes
-        # A better way would be polygon filling, but for a 20x20 grid, 
-        # sampling nodes + drawing lines is 'okay' approximation.
-        nodes = way.nodes
-        for i in range(len(nodes)):
-            n1 = nodes[i]
-            x1, y1 = to_grid(float(n1.lat), float(n1.lon))
-            
-            if 0 <= x1 < grid_size and 0 <= y1 < grid_size:
-                grid[y1][x1] = t_type
-            
-            # Interpolate to fill gaps (Bresenham-ish)
-            if i > 0:
-                n0 = nodes[i-1]
-                x0, y0 = to_grid(float(n0.lat), float(n0.lon))
-                
-                # Simple linear interpolation
-                dist = max(abs(x1-x0), abs(y1-y0))
-                if dist > 0:
-                    for step in range(dist):
-                        t = step / dist
-                        xi = int(x0 + (x1 - x0) * t)
-                        yi = int(y0 + (y1 - y0) * t)
-                        if 0 <= xi < grid_size and 0 <= yi < grid_size:
-                             # Precedence: Water > Urban > Forest > Open
-                             # Or whatever layer logic.
-                             # If we already have something set, maybe don't overwrite if lower priority?
-                             # Let's just overwrite for now.
-                             grid[yi][xi] = t_type
-
-    return grid.tolist()
+        # Trace the outline as well, so features smaller than a cell still
+        # show up and open ways (rivers, banks) are drawn as lines.
+        _rasterize_path(grid, node_xs[start:end], node_ys[start:end], t_type)
+
+    return grid
@@ -1,52 +1,103 @@
-import math
+from itertools import repeat
+import numpy as np
 import config
 from engine import models
 
-def validate_scenario(scenario: models.WargameScenario):
+# Max speed threshold (e.g., 2.9 to allow diagonal 2-step which is 2.82)
+# Let's be generous and say 3.0 to account for minor AI glitches
+MAX_STEP = 3.0
+MAX_STEP_SQ = MAX_STEP ** 2 # Compared against squared distances (no sqrt)
+
+def _check_frame(terrain, xs, ys):
     """
-    Runs physics and logic checks on a scenario. 
-    Populates the validation_errors field of each frame.
+    Numeric core of the terrain checks for one frame, on plain arrays only.
+    
+    Args:
+        terrain (np.ndarray): H x W terrain grid.
+        xs, ys (np.ndarray): Per-unit coordinates in this frame.
+    
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Per-unit masks (out_of_bounds, in_water).
     """
+    map_height, map_width = terrain.shape
     
-    # Track unit positions from previous frame
-    # Dict[unit_id, Unit]
-    prev_units = {}
+    # Check bounds first; only in-bounds units are looked up in the terrain
+    in_bounds = (xs >= 0) & (xs < map_width) & (ys >= 0) & (ys < map_height)
+    in_water = np.zeros(len(xs), dtype=bool)
+    # We could check for 'amphibious' type, but for now assuming all are blocked
+    in_water[in_bounds] = terrain[ys[in_bounds], xs[in_bounds]] == config.TerrainType.WATER.value
+    return ~in_bounds, in_water
+
+def _check_movement(xy, present):
+    """
+    Numeric core of the movement check, for every frame transition at once.
     
-    # Get map dimensions
-    map_height = len(scenario.terrain_map)
-    map_width = len(scenario.terrain_map[0]) if map_height > 0 else 0
+    Args:
+        xy (np.ndarray): (F, N, 2) positions of each tracked unit per frame.
+        present (np.ndarray): (F, N) mask of units present in each frame.
     
-    for frame_idx, frame in enumerate(scenario.frames):
-        # Reset errors for re-validation
-        frame.validation_errors = []
-        current_units = {u.unit_id: u for u in frame.unit_positions}
-        
-        # 1. Terrain Collision (Water) & Bounds
-        for unit in frame.unit_positions:
-            # Check bounds first
-            if not (0 <= unit.x < map_width and 0 <= unit.y < map_height):
-                 frame.validation_errors.append(f"Unit {unit.unit_id} out of bounds ({unit.x}, {unit.y})")
-                 continue
-                 
-            try:
-                terrain = scenario.terrain_map[unit.y][unit.x]
-                if terrain == config.TerrainType.WATER.value:
-                    # We could check for 'amphibious' type, but for now assuming all are blocked
-                    frame.validation_errors.append(f"Unit {unit.unit_id} is in Water at ({unit.x}, {unit.y})")
-            except IndexError:
-                pass # Already caught by bounds check
-
-        # 2. Movement Logic (vs Previous Frame)
-        if frame_idx > 0:
-            for unit_id, unit in current_units.items():
-                if unit_id in prev_units:
-                    prev = prev_units[unit_id]
-                    dist = math.sqrt((unit.x - prev.x)**2 + (unit.y - prev.y)**2)
-                    
-                    # Max speed threshold (e.g., 2.9 to allow diagonal 2-step which is 2.82)
-                    # Let's be generous and say 3.0 to account for minor AI glitches
-                    if dist > 3.0:
-                         frame.validation_errors.append(f"Unit {unit.unit_id} moved too fast ({dist:.2f} tiles)")
-        
-        # Update prev_units for next iteration
-        prev_units = current_units
\ No newline at end of file
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (F - 1, N) mask of units that moved too
+            fast into frame f + 1, and the squared step lengths.
+    """
+    diff = xy[1:] - xy[:-1]
+    dist_sq = (diff * diff).sum(axis=-1)
+    too_fast = present[1:] & present[:-1] & (dist_sq > MAX_STEP_SQ)
+    return too_fast, dist_sq
+
+def _validate_one_frame(frame, terrain):
+    """
+    Checks one frame's units against the terrain.
+    Only writes frame.validation_errors, so frames are independent of each other.
+
+    Returns:
+        list[str]: The frame's validation errors.
+    """
+    # Reset errors for re-validation (the field always holds a list, see
+    # Frame.validation_errors default_factory), reusing the existing list
+    frame.validation_errors.clear()
+    soa = frame.soa
+    xs, ys, unit_ids = soa.x, soa.y, soa.unit_id
+    
+    out_of_bounds, in_water = _check_frame(terrain, xs, ys)
+    
+    # 1. Terrain Collision (Water) & Bounds
+    for i in np.flatnonzero(out_of_bounds | in_water):
+        if in_water[i]:
+            frame.validation_errors.append(f"Unit {unit_ids[i]} is in Water at ({xs[i]}, {ys[i]})")
+        else:
+            frame.validation_errors.append(f"Unit {unit_ids[i]} out of bounds ({xs[i]}, {ys[i]})")
+    return frame.validation_errors
+
+def validate_scenario(scenario: models.WargameScenario):
+    """
+    Runs physics and logic checks on a scenario. 
+    Populates the validation_errors field of each frame.
+
+    Returns:
+        tuple[bool, list[str]]: Whether any frame has errors, and all errors
+                                prefixed with their 1-based frame number.
+    """
+    frames = scenario.frames
+    if not frames:
+        return False, []
+
+    terrain = scenario.terrain_map
+    frame_errors = list(map(_validate_one_frame, frames, repeat(terrain)))
+
+    # 2. Movement Logic (vs Previous Frame), batched over the whole scenario
+    unit_ids, _, xy, rows, order = scenario.unit_tracks()
+    too_fast, dist_sq = _check_movement(xy, rows >= 0)
+    for step in np.flatnonzero(too_fast.any(axis=1)):
+        cols = np.flatnonzero(too_fast[step])
+        cols = cols[np.argsort(order[step + 1, cols])] # Report by first appearance in the frame
+        frame_errors[step + 1].extend(
+            f"Unit {unit_ids[c]} moved too fast ({dist_sq[step, c] ** 0.5:.2f} tiles)" for c in cols
+        )
+
+    all_errors = [
+        f"Frame {frame_idx + 1}: {err}"
+        for frame_idx, errors in enumerate(frame_errors)
+        for err in errors
+    ]
+    return bool(all_errors), all_errors
@@ -1,5 +1,5 @@
 import pytest
-from engine.ai_handler import WargameScenario, Frame, Unit
+from engine.models import WargameScenario, Frame, Unit
 
 @pytest.fixture
 def sample_scenario():
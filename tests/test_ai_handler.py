@@ -1,28 +1,45 @@
+import json
+import numpy as np
 import pytest
 from unittest.mock import MagicMock, patch
-from engine.ai_handler import fetch_scenario, WargameScenario
+from engine import ai_handler
+from engine.ai_handler import fetch_scenario
 from openai import AuthenticationError
 
-@patch('openai.Client')
+@patch('engine.ai_handler.OpenAIClient')
 def test_fetch_scenario_success(mock_client_class, sample_scenario):
     # Setup mock
     mock_client = mock_client_class.return_value
     mock_completion = MagicMock()
-    mock_completion.choices[0].message.parsed = sample_scenario
-    mock_client.beta.chat.completions.parse.return_value = mock_completion
+    mock_completion.choices[0].message.content = sample_scenario.model_dump_json()
+    mock_client.chat.completions.create.return_value = mock_completion
     
     # Run
     result = fetch_scenario("fake_key", "Test Context")
     
     # Verify
     assert result == sample_scenario
-    mock_client.beta.chat.completions.parse.assert_called_once()
+    mock_client.chat.completions.create.assert_called_once()
 
-@patch('openai.Client')
+@patch('engine.ai_handler.OpenAIClient')
+def test_fetch_scenario_accepts_ragged_terrain(mock_client_class, sample_scenario):
+    reply = sample_scenario.model_dump()
+    reply["terrain_map"][-1] = reply["terrain_map"][-1][:-1] # One short row
+    mock_client = mock_client_class.return_value
+    mock_completion = MagicMock()
+    mock_completion.choices[0].message.content = json.dumps(reply)
+    mock_client.chat.completions.create.return_value = mock_completion
+    
+    result = fetch_scenario("fake_key", "Test Context")
+    
+    assert result.terrain_map.shape == (20, 20)
+    mock_client.chat.completions.create.assert_called_once()
+
+@patch('engine.ai_handler.OpenAIClient')
 def test_fetch_scenario_auth_error(mock_client_class):
     # Setup mock to raise error
     mock_client = mock_client_class.return_value
-    mock_client.beta.chat.completions.parse.side_effect = AuthenticationError(message="Auth failed", response=MagicMock(), body=None)
+    mock_client.chat.completions.create.side_effect = AuthenticationError(message="Auth failed", response=MagicMock(), body=None)
     
     # Run & Verify
     with pytest.raises(ValueError) as excinfo:
@@ -33,3 +50,49 @@ def test_fetch_scenario_no_key():
     with pytest.raises(ValueError) as excinfo:
         fetch_scenario("", "Test Context")
     assert "OpenAI API Key is missing" in str(excinfo.value)
+
+def test_prompt_units_omit_defaults(sample_scenario):
+    units_json = ai_handler._dump_for_prompt(ai_handler._UNITS_ADAPTER, sample_scenario.frames[0].unit_positions)
+    assert '"unit_id":"A1"' in units_json
+    assert "health" not in units_json
+    assert "status" not in units_json
+
+@patch('engine.ai_handler.OpenAIClient')
+def test_fetch_scenario_retry_history_is_fixed_length(mock_client_class, sample_scenario):
+    invalid = sample_scenario.model_copy(deep=True)
+    invalid.frames[1].unit_positions[0].y = 10 # Teleport
+
+    def make_completion(scenario):
+        completion = MagicMock()
+        completion.choices[0].message.content = scenario.model_dump_json()
+        return completion
+
+    mock_client = mock_client_class.return_value
+    mock_client.chat.completions.create.side_effect = [
+        make_completion(invalid),
+        make_completion(invalid),
+        make_completion(sample_scenario),
+    ]
+
+    result = fetch_scenario("fake_key", "Test Context")
+
+    assert not any(f.validation_errors for f in result.frames)
+    calls = mock_client.chat.completions.create.call_args_list
+    assert [len(c.kwargs["messages"]) for c in calls] == [2, 4, 4]
+    assert calls[1].kwargs["messages"][:2] == calls[2].kwargs["messages"][:2]
+
+@patch('engine.terrain_generator.fetch_terrain_map')
+@patch('engine.ai_handler.OpenAIClient')
+def test_fetch_scenario_enforces_real_terrain(mock_client_class, mock_fetch_terrain, sample_scenario):
+    real_terrain = np.full((20, 20), 3, dtype=np.int8)
+    mock_fetch_terrain.return_value = real_terrain
+
+    mock_client = mock_client_class.return_value
+    mock_completion = MagicMock()
+    mock_completion.choices[0].message.content = sample_scenario.model_dump_json()
+    mock_client.chat.completions.create.return_value = mock_completion
+
+    result = fetch_scenario("fake_key", "Test Context", geo_location="Somewhere")
+
+    assert result.terrain_map is real_terrain
+    assert result.model_dump()["terrain_map"][0][0] == 3
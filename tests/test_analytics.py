@@ -0,0 +1,33 @@
+import numpy as np
+from engine import analytics
+from engine.models import WargameScenario
+
+def test_calculate_heatmap_counts(sample_scenario):
+    heatmap = analytics.calculate_heatmap(sample_scenario)
+    
+    assert heatmap.shape == (20, 20)
+    assert heatmap.sum() == 4
+    assert heatmap[0][0] == 1 # A1 at (0,0) in frame 1
+    assert heatmap[1][0] == 1 # A1 at (0,1) in frame 2
+    assert heatmap[19][19] == 1
+    assert heatmap[18][19] == 1
+
+def test_calculate_heatmap_ignores_out_of_bounds(sample_scenario):
+    analytics.calculate_heatmap(sample_scenario) # Build the cached views first
+    sample_scenario.frames[0].unit_positions[1].x = 25
+    heatmap = analytics.calculate_heatmap(sample_scenario)
+    assert heatmap.sum() == 3
+
+def test_calculate_heatmap_empty():
+    empty = WargameScenario(terrain_map=[], frames=[])
+    assert analytics.calculate_heatmap(empty).size == 0
+
+def test_calculate_force_correlation(sample_scenario):
+    analytics.calculate_force_correlation(sample_scenario) # Build the cached views first
+    sample_scenario.frames[1].unit_positions.pop() # Red unit destroyed
+    df = analytics.calculate_force_correlation(sample_scenario)
+    
+    assert df.index.name == 'Frame'
+    assert list(df.index) == [1, 2]
+    assert list(df['Blue Force']) == [1, 1]
+    assert list(df['Red Force']) == [1, 0]
@@ -1,6 +1,8 @@
 import pytest
+import json
+from unittest.mock import patch
 import utils.exporter as exporter
-from engine.ai_handler import WargameScenario
+from engine.models import WargameScenario
 
 def test_generate_markdown_report_valid(sample_scenario):
     report = exporter.generate_markdown_report(sample_scenario)
@@ -19,3 +21,73 @@ def test_generate_markdown_report_empty():
     
     none_report = exporter.generate_markdown_report(None)
     assert "No data available" in none_report
+
+def test_attrition_counts(sample_scenario):
+    exporter.generate_markdown_report(sample_scenario) # Views built before the edit
+    sample_scenario.frames[1].unit_positions = sample_scenario.frames[1].unit_positions[:1] # B1 destroyed
+    
+    assert exporter._count_units(sample_scenario.frames[0]) == (1, 1)
+    assert exporter._count_units(sample_scenario.frames[1]) == (1, 0)
+    report = exporter.generate_markdown_report(sample_scenario)
+    assert "- **Red Force:** Start 1 -> End 0 (Losses: 1)" in report
+
+def test_build_exports_is_memoized_per_version(sample_scenario):
+    exporter.build_exports.clear()
+    with patch.object(exporter, 'generate_pdf_report', return_value=b"%PDF") as mock_pdf:
+        md, pdf, vtt = exporter.build_exports(sample_scenario, "v1")
+        exporter.build_exports(sample_scenario, "v1")
+        assert mock_pdf.call_count == 1
+        
+        exporter.build_exports(sample_scenario, "v2")
+        assert mock_pdf.call_count == 2
+    assert "# Commander's Journal" in md and pdf == b"%PDF"
+
+def test_generate_pdf_report(sample_scenario):
+    pdf = exporter.generate_pdf_report(sample_scenario)
+    assert pdf.startswith(b"%PDF")
+    
+    empty = exporter.generate_pdf_report(WargameScenario(terrain_map=[], frames=[]))
+    assert empty.startswith(b"%PDF")
+
+def test_generate_vtt_json(sample_scenario):
+    vtt = json.loads(exporter.generate_vtt_json(sample_scenario))
+    
+    assert (vtt["map"]["width"], vtt["map"]["height"]) == (20, 20)
+    assert vtt["map"]["terrain_layer"] == sample_scenario.terrain_map.tolist()
+    assert [(t["id"], t["side"], t["x"], t["y"]) for t in vtt["tokens"]] == [("A1", "Blue", 0, 0), ("B1", "Red", 19, 19)]
+
+def test_pdf_report_font_fallback(sample_scenario, monkeypatch, tmp_path):
+    sample_scenario.frames[0].frame_description = "Штурм высоты"
+    monkeypatch.setattr(exporter.config, "PDF_FONT_DIR", str(tmp_path)) # No fonts here
+    
+    assert exporter.PDFReport().use_unicode_fonts() is False
+    assert exporter.generate_pdf_report(sample_scenario).startswith(b"%PDF")
+
+def test_pdf_report_registers_fonts_only_when_needed(sample_scenario):
+    with patch.object(exporter.PDFReport, "use_unicode_fonts", autospec=True, return_value=False) as mock_fonts:
+        exporter.generate_pdf_report(sample_scenario)
+        assert mock_fonts.call_count == 0
+        
+        sample_scenario.frames[0].frame_description = "Штурм высоты"
+        exporter.generate_pdf_report(sample_scenario)
+        assert mock_fonts.call_count == 1
+
+def test_pdf_report_unicode_font(sample_scenario):
+    if not exporter.PDFReport().use_unicode_fonts():
+        pytest.skip("Configured PDF fonts are not installed")
+    sample_scenario.frames[0].frame_description = "Штурм высоты"
+    assert exporter.generate_pdf_report(sample_scenario).startswith(b"%PDF")
+
+def test_generate_markdown_report_summary(sample_scenario):
+    full = exporter.generate_markdown_report(sample_scenario)
+    summary = exporter.generate_markdown_report(sample_scenario, detail_level='summary')
+    
+    assert "| A1 |" in full
+    assert "Unit Dispositions" not in summary and "| A1 |" not in summary
+    assert "**Situation:** Start" in summary
+    assert "## Attrition Report" in summary
+
+@pytest.mark.parametrize("level", ["Full", "sumary", None])
+def test_generate_markdown_report_rejects_unknown_detail_level(sample_scenario, level):
+    with pytest.raises(ValueError):
+        exporter.generate_markdown_report(sample_scenario, detail_level=level)
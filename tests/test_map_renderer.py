@@ -0,0 +1,59 @@
+import plotly.graph_objects as go
+from engine import map_renderer
+
+def test_render_map_returns_figure(sample_scenario):
+    fig = map_renderer.render_map(sample_scenario.terrain_map, sample_scenario.frames[0].unit_positions)
+    
+    assert isinstance(fig, go.Figure)
+    blue, red = fig.data[-2:]
+    assert blue.type == red.type == 'scattergl'
+    assert (list(blue.x), list(blue.y), blue.marker.color) == ([0], [0], 'blue')
+    assert (list(red.x), list(red.y), red.marker.color) == ([19], [19], 'red')
+    assert "A1" in blue.hovertext[0]
+
+def test_render_map_reuses_terrain_trace(sample_scenario):
+    terrain = sample_scenario.terrain_map
+    units = sample_scenario.frames[0].unit_positions
+    map_renderer._build_terrain_trace.cache_clear()
+    
+    map_renderer.render_map(terrain, units)
+    map_renderer.render_map(terrain, units)
+    assert map_renderer._build_terrain_trace.cache_info().hits == 1
+    
+    terrain[3, 4] = 1 # Editor change invalidates the cached layer
+    fig = map_renderer.render_map(terrain, units)
+    assert fig.data[0].z[3][4] == 1
+
+def test_unit_icon_matches_keywords():
+    assert map_renderer._unit_icon("Heavy Tank") == "🛡️"
+    assert map_renderer._unit_icon("T-72B3") == map_renderer.config.UNIT_ICONS["default"]
+
+def test_render_map_batches_movement_arrows(sample_scenario):
+    fig = map_renderer.render_map(
+        sample_scenario.terrain_map,
+        sample_scenario.frames[1].unit_positions,
+        previous_units=sample_scenario.frames[0].unit_positions
+    )
+    
+    assert len(fig.layout.annotations) == 0
+    lines, heads = fig.data[1], fig.data[2]
+    assert list(lines.x[:2]) == [0, 0] and list(lines.y[:2]) == [0, 1]
+    assert [angle % 360 for angle in heads.marker.angle] == [0, 180] # A1 moves up, B1 moves down
+
+def test_render_map_aligns_reordered_units(sample_scenario):
+    a1, b1 = sample_scenario.frames[1].unit_positions
+    recruit = a1.model_copy(update={"unit_id": "A2"})
+    fig = map_renderer.render_map(
+        sample_scenario.terrain_map,
+        [recruit, b1, a1],
+        previous_units=list(reversed(sample_scenario.frames[0].unit_positions))
+    )
+    
+    heads = fig.data[2]
+    assert list(heads.x) == [19, 0] and list(heads.y) == [18, 1] # New A2 has no arrow
+
+def test_render_accumulated_heatmap(sample_scenario):
+    from engine import analytics
+    fig = map_renderer.render_accumulated_heatmap(analytics.calculate_heatmap(sample_scenario))
+    assert fig.data[0].z.shape == (20, 20)
+    assert fig.layout.xaxis.range == (-0.5, 19.5)
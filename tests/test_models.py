@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from engine.models import WargameScenario
+import config
+
+def test_terrain_map_is_int8_array(sample_scenario):
+    assert isinstance(sample_scenario.terrain_map, np.ndarray)
+    assert sample_scenario.terrain_map.dtype == np.int8
+    assert sample_scenario.terrain_map.shape == (20, 20)
+    assert (sample_scenario.height, sample_scenario.width) == (20, 20)
+
+def test_terrain_map_round_trip(sample_scenario):
+    dumped = sample_scenario.model_dump()
+    assert dumped["terrain_map"] == [[0] * 20 for _ in range(20)]
+
+    restored = WargameScenario.model_validate_json(sample_scenario.model_dump_json())
+    assert restored == sample_scenario
+
+def test_terrain_map_empty_and_invalid():
+    empty = WargameScenario(terrain_map=[], frames=[])
+    assert empty.terrain_map.shape == (0, 0)
+
+    with pytest.raises(ValidationError):
+        WargameScenario(terrain_map=[[[0]]], frames=[])
+
+def test_terrain_map_ragged_rows_are_normalized():
+    scenario = WargameScenario(terrain_map=[[1, 2], [3], [1, 2, 3]], frames=[])
+    assert scenario.terrain_map.tolist() == [[1, 2], [3, 0], [1, 2]]
+
+@pytest.mark.parametrize("bad", [[[1.7]], [[float("nan")]], np.array([[300]]), [["1"]]])
+def test_terrain_map_rejects_non_small_integers(bad):
+    with pytest.raises(ValidationError):
+        WargameScenario(terrain_map=bad, frames=[])
+
+def test_terrain_map_accepts_integral_floats():
+    assert WargameScenario(terrain_map=[[1.0, 2.0]], frames=[]).terrain_map.tolist() == [[1, 2]]
+
+def test_terrain_map_json_schema():
+    schema = WargameScenario.model_json_schema()
+    terrain = schema["properties"]["terrain_map"]
+    assert terrain["type"] == "array"
+    assert terrain["items"]["items"]["type"] == "integer"
+
+def test_frame_soa_view(sample_scenario):
+    soa = sample_scenario.frames[1].soa
+    assert list(soa.x) == [0, 19]
+    assert list(soa.y) == [1, 18]
+    assert list(soa.side) == [0, 1]
+    assert list(soa.unit_id) == ["A1", "B1"]
+    assert sample_scenario.frames[1].soa is soa # Cached
+
+    sample_scenario.frames[1].unit_positions.pop()
+    assert len(sample_scenario.frames[1].soa.x) == 1
+
+def test_frame_views_follow_edits(sample_scenario):
+    frame = sample_scenario.frames[1]
+    assert len(frame.soa.x) == 2 and len(frame.records) == 2
+    
+    frame.unit_positions[0].x = 7
+    assert frame.soa.x[0] == 7
+    assert frame.records[0].x == 7
+    
+    frame.unit_positions = frame.unit_positions[:1]
+    assert len(frame.soa.x) == 1
+    
+    copy = frame.model_copy(update={"unit_positions": []})
+    assert len(copy.soa.x) == 0
+    assert len(frame.soa.x) == 1
+
+def test_positions_matrix(sample_scenario):
+    matrix, frame_offsets = sample_scenario.positions_matrix()
+    assert matrix.shape == (4, 3)
+    assert list(frame_offsets) == [0, 2, 4]
+    assert matrix[frame_offsets[1]:frame_offsets[2]].tolist() == [[0, 1, 0], [19, 18, 1]]
+
+def test_frame_records(sample_scenario):
+    frame = sample_scenario.frames[0]
+    records = frame.records
+    
+    assert [r.unit_id for r in records] == ["A1", "B1"]
+    assert records[0].side == config.UnitSide.BLUE
+    assert records[1].health == 100
+    assert not hasattr(records[0], "__dict__")
+    with pytest.raises(AttributeError):
+        records[0].x = 5
+
+def test_frame_unit_labels(sample_scenario):
+    frame = sample_scenario.frames[1]
+    labels = frame.unit_labels
+    assert labels == (("A1", "B1"), ("UnitSide.BLUE", "UnitSide.RED"), ("(0, 1)", "(19, 18)"))
+    assert frame.unit_labels is labels
+    
+    frame.unit_positions[0].x = 5
+    assert frame.unit_labels[2][0] == "(5, 1)"
+
+def test_unit_tracks_are_cached_until_frames_change(sample_scenario):
+    tracks = sample_scenario.unit_tracks()
+    assert tracks.unit_ids == ["A1", "B1"]
+    assert tracks.xy[:, 1].tolist() == [[19, 19], [19, 18]]
+    assert sample_scenario.unit_tracks() is tracks
+    assert set(sample_scenario.__dict__) == {"terrain_map", "frames"} # Cached privately
+    
+    sample_scenario.frames[1].unit_positions.pop()
+    tracks = sample_scenario.unit_tracks()
+    assert tracks.rows.tolist() == [[0, 1], [0, -1]]
+    
+    sample_scenario.frames = sample_scenario.frames[:1]
+    assert sample_scenario.unit_tracks().xy.shape == (1, 2, 2)
+
+def test_equality_ignores_cached_views(sample_scenario):
+    sample_scenario.unit_tracks()
+    clone = sample_scenario.model_copy(deep=True)
+    assert clone == sample_scenario
+    
+    clone.frames[0].frame_description = "Changed"
+    assert clone != sample_scenario
+
+def test_terrain_map_is_contiguous():
+    transposed = np.arange(6, dtype=np.int8).reshape(2, 3).T
+    scenario = WargameScenario(terrain_map=transposed, frames=[])
+    
+    assert scenario.terrain_map.flags.c_contiguous
+    assert scenario.terrain_map.tobytes() == bytes([0, 3, 1, 4, 2, 5])
@@ -57,3 +57,12 @@ def test_navigation(mock_session_state, sample_scenario):
     # Prev frame (should stay at 0)
     state_manager.prev_frame()
     assert mock_session_state['current_frame_index'] == 0
+
+def test_scenario_version_changes(mock_session_state, sample_scenario):
+    state_manager.initialize_state()
+    assert mock_session_state['scenario_version'] is None
+    
+    state_manager.set_scenario(sample_scenario)
+    first = mock_session_state['scenario_version']
+    state_manager.mark_scenario_changed()
+    assert mock_session_state['scenario_version'] not in (None, first)
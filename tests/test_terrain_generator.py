@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from engine import terrain_generator
+import config
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    terrain_generator._geocode.cache_clear()
+    yield
+    terrain_generator._geocode.cache_clear()
+
+def make_way(coords, tags, closed=True):
+    nodes = [SimpleNamespace(id=i, lat=lat, lon=lon) for i, (lat, lon) in enumerate(coords)]
+    if closed:
+        nodes.append(nodes[0])
+    return SimpleNamespace(nodes=nodes, tags=tags)
+
+def test_fill_polygon_fills_interior():
+    grid = np.zeros((10, 10), dtype=np.int8)
+    xs = np.array([2.0, 8.0, 8.0, 2.0, 2.0])
+    ys = np.array([2.0, 2.0, 8.0, 8.0, 2.0])
+    
+    terrain_generator._fill_polygon(grid, xs, ys, 3)
+    
+    assert (grid[2:8, 2:8] == 3).all()
+    assert grid.sum() == 36 * 3
+
+def test_rasterize_path_matches_stepwise_interpolation():
+    xs = np.array([1, 7, 7, 0, 12])
+    ys = np.array([1, 4, 9, 2, 3])
+    grid = np.zeros((10, 10), dtype=np.int8)
+    
+    terrain_generator._rasterize_path(grid, xs, ys, 1)
+    
+    expected = np.zeros((10, 10), dtype=np.int8)
+    for i in range(len(xs)):
+        if 0 <= xs[i] < 10 and 0 <= ys[i] < 10:
+            expected[ys[i], xs[i]] = 1
+        if i > 0:
+            x0, y0, x1, y1 = xs[i-1], ys[i-1], xs[i], ys[i]
+            dist = max(abs(x1 - x0), abs(y1 - y0))
+            for step in range(dist):
+                xi = int(x0 + (x1 - x0) * step / dist)
+                yi = int(y0 + (y1 - y0) * step / dist)
+                if 0 <= xi < 10 and 0 <= yi < 10:
+                    expected[yi, xi] = 1
+    assert np.array_equal(grid, expected)
+
+@patch('engine.terrain_generator.overpy.Overpass')
+@patch('engine.terrain_generator.get_coordinates', return_value=(0.0, 0.0))
+def test_fetch_terrain_map_rasterizes_ways(mock_coords, mock_overpass):
+    lake = make_way(
+        [(-0.002, -0.002), (-0.002, 0.002), (0.002, 0.002), (0.002, -0.002)],
+        {"natural": "water"}
+    )
+    mock_overpass.return_value.query.return_value = SimpleNamespace(ways=[lake])
+    
+    grid = terrain_generator.fetch_terrain_map("Anywhere", grid_size=10)
+    
+    assert grid.dtype == np.int8
+    assert grid.shape == (10, 10)
+    assert (grid[3:7, 3:7] == config.TerrainType.WATER.value).all()
+    assert grid[0][0] == config.TerrainType.OPEN.value
+
+@patch('engine.terrain_generator.get_coordinates', return_value=None)
+def test_fetch_terrain_map_unknown_location(mock_coords):
+    grid = terrain_generator.fetch_terrain_map("Nowhere", grid_size=5)
+    assert (grid == config.TerrainType.OPEN.value).all()
+
+@patch('engine.terrain_generator.overpy.Overpass')
+@patch('engine.terrain_generator.get_coordinates', return_value=(0.0, 0.0))
+def test_fetch_terrain_map_overpass_error(mock_coords, mock_overpass):
+    mock_overpass.return_value.query.side_effect = RuntimeError("timeout")
+    grid = terrain_generator.fetch_terrain_map("Anywhere", grid_size=5)
+    assert grid.shape == (5, 5)
+    assert (grid == config.TerrainType.OPEN.value).all()
+
+@patch('engine.terrain_generator.overpy.Overpass')
+@patch('engine.terrain_generator.get_coordinates', return_value=(0.0, 0.0))
+def test_fetch_terrain_map_caches_overpass(mock_coords, mock_overpass):
+    wood = make_way([(0.001, 0.001), (0.001, 0.003), (0.003, 0.003), (0.003, 0.001)], {"natural": "wood"})
+    mock_overpass.return_value.query.return_value = SimpleNamespace(ways=[wood])
+    
+    first = terrain_generator.fetch_terrain_map("Anywhere", grid_size=10)
+    second = terrain_generator.fetch_terrain_map("Anywhere", grid_size=10)
+    
+    assert mock_overpass.return_value.query.call_count == 1
+    assert np.array_equal(first, second)
+    assert (first == config.TerrainType.FOREST.value).any()
+
+@patch('engine.terrain_generator.overpy.Overpass')
+@patch('engine.terrain_generator.get_coordinates', return_value=(0.0, 0.0))
+def test_empty_overpass_results_are_not_cached(mock_coords, mock_overpass):
+    mock_overpass.return_value.query.return_value = SimpleNamespace(ways=[])
+    
+    terrain_generator.fetch_terrain_map("Anywhere", grid_size=10)
+    terrain_generator.fetch_terrain_map("Anywhere", grid_size=10)
+    
+    assert mock_overpass.return_value.query.call_count == 2
+
+@patch('engine.terrain_generator.Nominatim')
+def test_get_coordinates_is_cached(mock_nominatim):
+    mock_nominatim.return_value.geocode.return_value = SimpleNamespace(latitude=1.5, longitude=2.5)
+    
+    assert terrain_generator.get_coordinates("Somewhere") == (1.5, 2.5)
+    terrain_generator._geocode.cache_clear() # Falls back to the disk cache
+    assert terrain_generator.get_coordinates("Somewhere") == (1.5, 2.5)
+    assert mock_nominatim.return_value.geocode.call_count == 1
+
+@patch('engine.terrain_generator.overpy.Overpass')
+@patch('engine.terrain_generator.Nominatim')
+def test_unwritable_cache_keeps_network_results(mock_nominatim, mock_overpass, tmp_path, monkeypatch):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    monkeypatch.setattr(config, "CACHE_DIR", str(blocker)) # makedirs under a file fails
+    mock_nominatim.return_value.geocode.return_value = SimpleNamespace(latitude=0.0, longitude=0.0)
+    wood = make_way([(0.001, 0.001), (0.001, 0.003), (0.003, 0.003), (0.003, 0.001)], {"natural": "wood"})
+    mock_overpass.return_value.query.return_value = SimpleNamespace(ways=[wood])
+    
+    grid = terrain_generator.fetch_terrain_map("Anywhere", grid_size=10)
+    
+    assert mock_overpass.return_value.query.call_count == 1
+    assert (grid == config.TerrainType.FOREST.value).any()
+
+def test_cache_store_uses_unique_temp_files(monkeypatch):
+    seen = []
+    real_replace = terrain_generator.os.replace
+    def record_replace(src, dst):
+        seen.append(src)
+        real_replace(src, dst)
+    monkeypatch.setattr(terrain_generator.os, "replace", record_replace)
+    
+    for _ in range(2):
+        terrain_generator._cache_store("geocode", "key", "json", lambda f: f.write(b"[1, 2]"))
+    
+    assert len(set(seen)) == 2
+    assert terrain_generator._cache_load("geocode", "key", "json", terrain_generator.json.load) == [1, 2]
+
+@patch('engine.terrain_generator.overpy.Overpass')
+@patch('engine.terrain_generator.get_coordinates', return_value=(0.0, 0.0))
+def test_untagged_rings_do_not_erase_features(mock_coords, mock_overpass):
+    wood = make_way([(-0.001, -0.001), (-0.001, 0.001), (0.001, 0.001), (0.001, -0.001)], {"natural": "wood"})
+    ring = make_way([(-0.004, -0.004), (-0.004, 0.004), (0.004, 0.004), (0.004, -0.004)], {})
+    mock_overpass.return_value.query.return_value = SimpleNamespace(ways=[wood, ring])
+    
+    grid = terrain_generator.fetch_terrain_map("Anywhere", grid_size=10)
+    
+    assert (grid == config.TerrainType.FOREST.value).sum() > 0
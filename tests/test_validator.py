@@ -1,5 +1,6 @@
 import pytest
-from engine.ai_handler import WargameScenario, Frame, Unit
+import numpy as np
+from engine.models import WargameScenario, Frame, Unit
 from engine import validator
 import config
 
@@ -39,3 +40,98 @@ def test_validation_water_collision():
     
     assert len(scenario.frames[0].validation_errors) > 0
     assert "is in Water" in scenario.frames[0].validation_errors[0]
+
+def test_validation_returns_collected_errors(sample_scenario):
+    has_errors, errors = validator.validate_scenario(sample_scenario)
+    assert has_errors is False
+    assert errors == []
+
+    sample_scenario.frames[1].unit_positions[0].x = 10 # Teleport
+    has_errors, errors = validator.validate_scenario(sample_scenario)
+    assert has_errors is True
+    assert len(errors) == 1
+    assert errors[0].startswith("Frame 2: Unit A1 moved too fast")
+
+def test_revalidation_sees_unit_edits(sample_scenario):
+    validator.validate_scenario(sample_scenario)
+    
+    sample_scenario.frames[0].unit_positions[1].x = 99
+    has_errors, errors = validator.validate_scenario(sample_scenario)
+    assert "Frame 1: Unit B1 out of bounds (99, 19)" in errors
+
+def test_validation_movement_matches_units_by_id():
+    def unit(uid, x, y):
+        return Unit(unit_id=uid, side=config.UnitSide.BLUE, type="Tank", x=x, y=y, health=100, range=1, status="Active")
+    
+    frame1 = Frame(frame_description="Start", unit_positions=[unit("U1", 0, 0), unit("U2", 5, 5)], combat_log=[])
+    # U2 moves 3 tiles (allowed), U1 teleports, U3 is a new arrival
+    frame2 = Frame(frame_description="End", unit_positions=[unit("U3", 15, 15), unit("U2", 5, 8), unit("U1", 4, 3)], combat_log=[])
+    scenario = WargameScenario(terrain_map=[[0]*20 for _ in range(20)], frames=[frame1, frame2])
+    
+    validator.validate_scenario(scenario)
+    
+    assert scenario.frames[1].validation_errors == ["Unit U1 moved too fast (5.00 tiles)"]
+
+def test_validation_movement_orders_duplicate_ids_by_first_row():
+    def unit(uid, x, y):
+        return Unit(unit_id=uid, side=config.UnitSide.BLUE, type="Tank", x=x, y=y, health=100, range=1, status="Active")
+    
+    frame1 = Frame(frame_description="Start", unit_positions=[unit("U1", 0, 0), unit("U2", 10, 10)], combat_log=[])
+    # U1 first appears before U2 but its last (reported) row comes after it
+    frame2 = Frame(frame_description="End", unit_positions=[unit("U1", 0, 0), unit("U2", 14, 10), unit("U1", 5, 0)], combat_log=[])
+    scenario = WargameScenario(terrain_map=[[0]*20 for _ in range(20)], frames=[frame1, frame2])
+    
+    validator.validate_scenario(scenario)
+    
+    assert scenario.frames[1].validation_errors == [
+        "Unit U1 moved too fast (5.00 tiles)",
+        "Unit U2 moved too fast (4.00 tiles)",
+    ]
+
+def test_validation_bounds_and_water_in_unit_order():
+    terrain = [[0]*5 for _ in range(5)]
+    terrain[2][3] = config.TerrainType.WATER.value
+    units = [
+        Unit(unit_id=uid, side=config.UnitSide.RED, type="Infantry", x=x, y=y, health=100, range=1, status="Active")
+        for uid, x, y in [("R1", 3, 2), ("R2", 1, 1), ("R3", 7, 0), ("R4", 0, 5)]
+    ]
+    scenario = WargameScenario(terrain_map=terrain, frames=[Frame(frame_description="Start", unit_positions=units, combat_log=[])])
+    
+    validator.validate_scenario(scenario)
+    
+    assert scenario.frames[0].validation_errors == [
+        "Unit R1 is in Water at (3, 2)",
+        "Unit R3 out of bounds (7, 0)",
+        "Unit R4 out of bounds (0, 5)",
+    ]
+
+def test_check_frame_kernel():
+    terrain = np.zeros((4, 4), dtype=np.int8)
+    terrain[0, 1] = config.TerrainType.WATER.value
+    
+    oob, water = validator._check_frame(terrain, np.array([1, 4, 3]), np.array([0, 0, 3]))
+    
+    assert oob.tolist() == [False, True, False]
+    assert water.tolist() == [True, False, False]
+
+def test_check_movement_kernel():
+    xy = np.array([[[0, 0], [0, 0]], [[3, 3], [4, 0]]])
+    present = np.array([[True, False], [True, True]])
+    
+    fast, dist_sq = validator._check_movement(xy, present)
+    
+    assert fast.tolist() == [[True, False]] # Unit 1 moved 4 tiles but was absent before
+    assert dist_sq.tolist() == [[18, 16]]
+
+def test_validation_empty_scenario():
+    scenario = WargameScenario(terrain_map=[], frames=[])
+    assert validator.validate_scenario(scenario) == (False, [])
+
+def test_revalidation_clears_previous_errors(sample_scenario):
+    errors = sample_scenario.frames[1].validation_errors
+    errors.append("stale")
+    
+    validator.validate_scenario(sample_scenario)
+    
+    assert sample_scenario.frames[1].validation_errors is errors
+    assert errors == []
@@ -1,37 +1,76 @@
 import pandas as pd
 import io
-import json
+import os
+import orjson
+import numpy as np
+import streamlit as st
 from fpdf import FPDF
 import config
+from engine import models
 
 class PDFReport(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Core fonts are cheap but only cover latin-1; see use_unicode_fonts
+        self.report_font, self.report_mono_font = 'Helvetica', 'Courier'
+
+    def use_unicode_fonts(self):
+        """
+        Switches to the configured TTF family, if installed. Parsing the TTF
+        files is expensive and embeds them in the output, so only call this
+        when some text cannot be encoded as latin-1, before add_page().
+
+        Returns:
+            bool: Whether Unicode fonts are now in use.
+        """
+        regular = os.path.join(config.PDF_FONT_DIR, config.PDF_FONT_FILES[""])
+        mono = os.path.join(config.PDF_FONT_DIR, config.PDF_MONO_FONT_FILE)
+        if os.path.exists(regular) and os.path.exists(mono):
+            for style, filename in config.PDF_FONT_FILES.items():
+                path = os.path.join(config.PDF_FONT_DIR, filename)
+                self.add_font('ReportSans', style, path if os.path.exists(path) else regular)
+            self.add_font('ReportMono', '', mono)
+            self.report_font, self.report_mono_font = 'ReportSans', 'ReportMono'
+        return self.unicode_text
+
+    @property
+    def unicode_text(self):
+        """Whether arbitrary Unicode text can be written (TTF fonts registered)."""
+        return self.report_font != 'Helvetica'
+
     def header(self):
-        self.set_font('Helvetica', 'B', 16)
+        self.set_font(self.report_font, 'B', 16)
         self.cell(0, 10, "Commander's Journal", 0, 1, 'C')
         self.ln(10)
 
     def footer(self):
         self.set_y(-15)
-        self.set_font('Helvetica', 'I', 8)
+        self.set_font(self.report_font, 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
+# Markdown unit table heading, emitted before each frame's unit rows
+_MD_UNIT_TABLE_HEAD = "\n**Unit Dispositions:**\n| Unit ID | Side | Position (X,Y) |\n|---|---|---|"
+
+def _count_units(frame):
+    """Returns the (blue, red) unit counts of a frame."""
+    sides = frame.soa.side
+    b = int(np.count_nonzero(sides == models.SIDE_CODES[config.UnitSide.BLUE]))
+    return b, len(sides) - b
+
 def generate_vtt_json(scenario) -> str:
     """
     Generates a generic VTT-compatible JSON.
     Includes map dimensions, terrain data, and unit tokens.
     """
-    height = len(scenario.terrain_map)
-    width = len(scenario.terrain_map[0]) if height > 0 else 0
-    
     # Structure suitable for import scripts or custom VTT modules
     vtt_data = {
         "format_version": "1.0",
         "map": {
-            "width": width,
-            "height": height,
+            "width": scenario.width,
+            "height": scenario.height,
             "grid_type": "square",
             "cell_size_pixels": 100, # standard
-            "terrain_layer": scenario.terrain_map
+            "terrain_layer": scenario.terrain_map # Serialized natively by orjson
         },
         "tokens": []
     }
@@ -55,69 +94,61 @@ def generate_vtt_json(scenario) -> str:
             }
             vtt_data["tokens"].append(token)
             
-    return json.dumps(vtt_data, indent=2)
+    return orjson.dumps(vtt_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
 
-def generate_markdown_report(scenario_data):
+def generate_markdown_report(scenario_data, detail_level='full'):
     """
     Generates a Markdown report ('Commander's Journal') from the scenario frames.
     
     Args:
         scenario_data: The Pydantic model or dictionary containing 'frames'.
                        Expected structure has a .frames attribute which is a list.
+        detail_level (str): 'full' includes a unit table per frame; 'summary'
+                            keeps only the situation text and attrition report.
+                            Any other value raises ValueError.
     
     Returns:
         str: The complete Markdown string.
     """
+    if detail_level not in ('full', 'summary'):
+        raise ValueError(f"Unknown detail_level {detail_level!r} (expected 'full' or 'summary')")
     if not scenario_data or not scenario_data.frames:
         return "# Commander's Journal\n\nNo data available."
 
-    lines = ["# Commander's Journal", ""]
-    
-    lines.append("## Tactical Summary")
-    lines.append(f"**Total Frames:** {len(scenario_data.frames)}")
-    lines.append("---")
+    frames = scenario_data.frames
+    chunks = [f"# Commander's Journal\n\n## Tactical Summary\n**Total Frames:** {len(frames)}\n---"]
     
-    for i, frame in enumerate(scenario_data.frames):
-        lines.append(f"### Frame {i + 1}")
-        lines.append(f"**Situation:** {frame.frame_description}")
+    for i, frame in enumerate(frames):
+        chunk = f"### Frame {i + 1}\n**Situation:** {frame.frame_description}"
         
         # Optional: Add unit summary table for this frame if desired
-        if hasattr(frame, 'unit_positions') and frame.unit_positions:
-            lines.append("\n**Unit Dispositions:**")
-            # Create a simple table
-            header = "| Unit ID | Side | Position (X,Y) |"
-            sep = "|---|---|---|"
-            lines.append(header)
-            lines.append(sep)
-            
-            for unit in frame.unit_positions:
-                # Handle coordinates safely
-                pos_str = f"({unit.x}, {unit.y})"
-                lines.append(f"| {unit.unit_id} | {unit.side} | {pos_str} |")
+        if detail_level == 'full' and frame.unit_positions:
+            rows = "\n".join(
+                f"| {unit_id} | {side} | {pos} |"
+                for unit_id, side, pos in zip(*frame.unit_labels)
+            )
+            chunk = f"{chunk}\n{_MD_UNIT_TABLE_HEAD}\n{rows}"
         
-        lines.append("\n---")
+        chunks.append(f"{chunk}\n\n---")
     
     # Attrition Report
-    lines.append("## Attrition Report")
-    if scenario_data.frames:
-        first_frame = scenario_data.frames[0]
-        last_frame = scenario_data.frames[-1]
-        
-        def count_units(frame):
-            b, r = 0, 0
-            if frame.unit_positions:
-                for u in frame.unit_positions:
-                    if u.side == config.UnitSide.BLUE: b += 1
-                    else: r += 1
-            return b, r
-
-        b_start, r_start = count_units(first_frame)
-        b_end, r_end = count_units(last_frame)
-        
-        lines.append(f"- **Blue Force:** Start {b_start} -> End {b_end} (Losses: {b_start - b_end})")
-        lines.append(f"- **Red Force:** Start {r_start} -> End {r_end} (Losses: {r_start - r_end})")
+    chunks.append("## Attrition Report")
+    b_start, r_start = _count_units(frames[0])
+    b_end, r_end = _count_units(frames[-1])
+    
+    chunks.append(f"- **Blue Force:** Start {b_start} -> End {b_end} (Losses: {b_start - b_end})")
+    chunks.append(f"- **Red Force:** Start {r_start} -> End {r_end} (Losses: {r_start - r_end})")
+
+    return "\n".join(chunks)
 
-    return "\n".join(lines)
+def _is_latin1(frames):
+    """Whether every description and unit id can be written with the core fonts."""
+    text = "".join(frame.frame_description + "".join(frame.soa.unit_id) for frame in frames)
+    try:
+        text.encode('latin-1')
+    except UnicodeEncodeError:
+        return False
+    return True
 
 def generate_pdf_report(scenario_data):
     """
@@ -126,42 +157,48 @@ def generate_pdf_report(scenario_data):
         bytes: The PDF content.
     """
     pdf = PDFReport()
+    if scenario_data and scenario_data.frames and not _is_latin1(scenario_data.frames):
+        pdf.use_unicode_fonts()
     pdf.add_page()
-    pdf.set_font("Helvetica", size=12)
+    pdf.set_font(pdf.report_font, size=12)
     
     if not scenario_data or not scenario_data.frames:
         pdf.cell(0, 10, "No data available.", ln=True)
         return bytes(pdf.output())
 
-    pdf.set_font("Helvetica", 'B', 14)
+    frames = scenario_data.frames
+    pdf.set_font(pdf.report_font, 'B', 14)
     pdf.cell(0, 10, "Tactical Summary", ln=True)
-    pdf.set_font("Helvetica", size=12)
-    pdf.cell(0, 10, f"Total Frames: {len(scenario_data.frames)}", ln=True)
+    pdf.set_font(pdf.report_font, size=12)
+    pdf.cell(0, 10, f"Total Frames: {len(frames)}", ln=True)
     pdf.ln(5)
     
-    for i, frame in enumerate(scenario_data.frames):
-        pdf.set_font("Helvetica", 'B', 12)
+    for i, frame in enumerate(frames):
+        pdf.set_font(pdf.report_font, 'B', 12)
         pdf.cell(0, 10, f"Frame {i + 1}", ln=True)
         
-        pdf.set_font("Helvetica", size=11)
+        pdf.set_font(pdf.report_font, size=11)
         # MultiCell for description to handle wrapping
-        # Use latin-1 compatible replacement for common issues if needed, 
-        # strictly speaking fpdf2 core fonts are latin-1.
-        desc = frame.frame_description.encode('latin-1', 'replace').decode('latin-1')
+        # The core fonts are strictly latin-1, so only fall back to replacing
+        # other characters when no Unicode font is registered.
+        desc = frame.frame_description
+        if not pdf.unicode_text:
+            desc = desc.encode('latin-1', 'replace').decode('latin-1')
         pdf.multi_cell(0, 6, f"Situation: {desc}")
         pdf.ln(2)
         
-        if hasattr(frame, 'unit_positions') and frame.unit_positions:
-            pdf.set_font("Helvetica", 'I', 10)
+        if frame.unit_positions:
+            pdf.set_font(pdf.report_font, 'I', 10)
             pdf.cell(0, 8, "Unit Dispositions:", ln=True)
             
             # Simple list view for PDF instead of complex table grid for now
-            pdf.set_font("Courier", size=9) # Monospace for alignment
-            for unit in frame.unit_positions:
-                pos_str = f"({unit.x}, {unit.y})"
-                # Align columns manually with padding
-                line_str = f"{unit.unit_id:<15} | {str(unit.side):<10} | {pos_str}"
-                pdf.cell(0, 5, line_str, ln=True)
+            pdf.set_font(pdf.report_mono_font, size=9) # Monospace for alignment
+            # Align columns manually with padding; one multi_cell for the whole list
+            body = "\n".join(
+                f"{unit_id:<15} | {side:<10} | {pos}"
+                for unit_id, side, pos in zip(*frame.unit_labels)
+            )
+            pdf.multi_cell(0, 5, body)
         
         pdf.ln(5)
         pdf.line(10, pdf.get_y(), 200, pdf.get_y()) # Horizontal line
@@ -169,26 +206,27 @@ def generate_pdf_report(scenario_data):
 
     # Attrition Report
     pdf.add_page()
-    pdf.set_font("Helvetica", 'B', 14)
+    pdf.set_font(pdf.report_font, 'B', 14)
     pdf.cell(0, 10, "Attrition Report", ln=True)
-    pdf.set_font("Helvetica", size=12)
+    pdf.set_font(pdf.report_font, size=12)
     
-    if scenario_data.frames:
-        first_frame = scenario_data.frames[0]
-        last_frame = scenario_data.frames[-1]
-        
-        def count_units(frame):
-            b, r = 0, 0
-            if frame.unit_positions:
-                for u in frame.unit_positions:
-                    if u.side == config.UnitSide.BLUE: b += 1
-                    else: r += 1
-            return b, r
-
-        b_start, r_start = count_units(first_frame)
-        b_end, r_end = count_units(last_frame)
-        
-        pdf.cell(0, 10, f"Blue Force: Start {b_start} -> End {b_end} (Losses: {b_start - b_end})", ln=True)
-        pdf.cell(0, 10, f"Red Force: Start {r_start} -> End {r_end} (Losses: {r_start - r_end})", ln=True)
+    b_start, r_start = _count_units(frames[0])
+    b_end, r_end = _count_units(frames[-1])
+    
+    pdf.cell(0, 10, f"Blue Force: Start {b_start} -> End {b_end} (Losses: {b_start - b_end})", ln=True)
+    pdf.cell(0, 10, f"Red Force: Start {r_start} -> End {r_end} (Losses: {r_start - r_end})", ln=True)
 
     return bytes(pdf.output())
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def build_exports(_scenario, scenario_version, md_detail_level='full'):
+    """
+    Builds the (markdown, pdf, vtt_json) exports once per scenario version
+    instead of on every Streamlit rerun. The scenario itself is not hashed
+    (leading underscore); scenario_version from state_manager identifies it.
+    """
+    return (
+        generate_markdown_report(_scenario, detail_level=md_detail_level),
+        generate_pdf_report(_scenario),
+        generate_vtt_json(_scenario),
+    )
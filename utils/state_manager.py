@@ -1,3 +1,4 @@
+import uuid
 import streamlit as st
 
 def initialize_state():
@@ -12,6 +13,8 @@ def initialize_state():
     # Scenario Data
     if 'current_scenario' not in st.session_state:
         st.session_state.current_scenario = None # Holds the full JSON object
+    if 'scenario_version' not in st.session_state:
+        st.session_state.scenario_version = None # Cache key for exports, see mark_scenario_changed
     
     # Navigation
     if 'current_frame_index' not in st.session_state:
@@ -22,16 +25,25 @@ def update_metrics(num_frames):
     st.session_state.total_scenarios_run += 1
     st.session_state.total_frames_generated += num_frames
 
+def mark_scenario_changed():
+    """
+    Gives the current scenario a new version key. Call after any in-place edit
+    so memoized exports are rebuilt. The key is unique across sessions.
+    """
+    st.session_state.scenario_version = uuid.uuid4().hex
+
 def set_scenario(scenario_data):
     """Sets the new scenario and resets navigation."""
     st.session_state.current_scenario = scenario_data
     st.session_state.current_frame_index = 0
+    mark_scenario_changed()
     update_metrics(len(scenario_data.frames))
 
 def load_existing_scenario(scenario_data):
     """Sets a loaded scenario without incrementing generation metrics."""
     st.session_state.current_scenario = scenario_data
     st.session_state.current_frame_index = 0
+    mark_scenario_changed()
 
 def next_frame():
     """Advances to the next frame if possible."""